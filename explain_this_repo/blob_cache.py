@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+import zlib
+from typing import Optional
+
+from explain_this_repo.cache import CacheStore, opened_store, shared_store
+
+BLOB_CACHE_NAME = "blobs"
+BLOB_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def git_blob_sha(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _blob_store() -> Optional[CacheStore]:
+    return shared_store(BLOB_CACHE_NAME, BLOB_CACHE_MAX_BYTES)
+
+
+def get_blob(sha: Optional[str], max_bytes: int) -> Optional[bytes]:
+    # A git blob SHA names its content forever, so a hit never needs to be
+    # revalidated; the only question is whether enough of it was kept.
+    store = _blob_store()
+    if store is None or not sha:
+        return None
+
+    try:
+        entry = store.get(sha)
+    except Exception:
+        return None
+
+    if entry is None:
+        store.count("misses")
+        return None
+
+    if (
+        not entry.meta.get("complete")
+        and int(entry.meta.get("length") or 0) < max_bytes
+    ):
+        store.count("misses")
+        return None
+
+    try:
+        data = zlib.decompress(entry.value)
+    except zlib.error:
+        return None
+
+    store.count("hits")
+    return data[:max_bytes]
+
+
+def get_blob_size(sha: Optional[str]) -> Optional[int]:
+    store = _blob_store()
+    if store is None or not sha:
+        return None
+
+    try:
+        entry = store.get(sha)
+    except Exception:
+        return None
+
+    if entry is None:
+        return None
+
+    size = entry.meta.get("size")
+    return int(size) if isinstance(size, int) else None
+
+
+def put_blob(
+    sha: Optional[str],
+    data: bytes,
+    complete: bool,
+    size: Optional[int] = None,
+) -> None:
+    store = _blob_store()
+    if store is None or not sha:
+        return
+
+    meta = {"complete": complete, "length": len(data)}
+    if size is not None:
+        meta["size"] = size
+    elif complete:
+        meta["size"] = len(data)
+
+    try:
+        existing = store.get(sha)
+        if existing is not None:
+            kept = int(existing.meta.get("length") or 0)
+            if existing.meta.get("complete") or kept >= len(data):
+                return
+        store.put(sha, zlib.compress(data), meta)
+    except Exception:
+        pass
+
+
+def blob_counters() -> tuple[int, int]:
+    store = opened_store(BLOB_CACHE_NAME)
+    if store is None:
+        return 0, 0
+    return store.counters.hits, store.counters.misses
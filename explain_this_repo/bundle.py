@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import gzip
+import json
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from explain_this_repo.cache import CacheStore, shared_store
+from explain_this_repo.github import (
+    fetch_languages,
+    fetch_readme,
+    fetch_repo,
+)
+from explain_this_repo.repo_reader import (
+    DEFAULT_FETCH_CONCURRENCY,
+    ReadResult,
+    read_repo_signal_files,
+)
+
+BUNDLE_FORMAT = "explainthisrepo-bundle"
+BUNDLE_VERSION = 1
+BUNDLE_SUFFIX = ".etr"
+BUNDLE_PARTS = ("metadata", "readme", "files", "languages")
+
+TREE_CACHE_NAME = "trees"
+TREE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Tree entries keep only what selection, stack detection and the blob
+# cache look at; API URLs and modes would dominate the file otherwise.
+_TREE_KEYS = ("path", "type", "sha", "size")
+
+
+@dataclass
+class SignalBundle:
+    owner: str
+    repo: str
+    commit: Optional[str] = None
+    parts: list[str] = field(default_factory=list)
+    repo_data: dict = field(default_factory=dict)
+    readme: Optional[str] = None
+    tree: Optional[list[dict]] = None
+    tree_text: Optional[str] = None
+    files_text: Optional[str] = None
+    key_files: dict[str, str] = field(default_factory=dict)
+    blob_shas: dict[str, str] = field(default_factory=dict)
+    languages: Optional[dict[str, int]] = None
+    tree_sha: Optional[str] = None
+
+    @property
+    def read_result(self) -> Optional[ReadResult]:
+        if self.tree is None or self.tree_text is None:
+            return None
+        return ReadResult(
+            tree=self.tree,
+            tree_text=self.tree_text,
+            files_text=self.files_text or "",
+            key_files=self.key_files,
+            blob_shas=self.blob_shas,
+        )
+
+    def missing_parts(self, needed: Iterable[str]) -> list[str]:
+        return [part for part in needed if part not in self.parts]
+
+
+def fetch_signal_bundle(
+    owner: str,
+    repo: str,
+    *,
+    commit: Optional[str] = None,
+    ref: Optional[str] = None,
+    parts: Iterable[str] = BUNDLE_PARTS,
+    fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    backend: str = "auto",
+    on_files_error: Optional[Callable[[Exception], None]] = None,
+) -> SignalBundle:
+    wanted = [part for part in BUNDLE_PARTS if part in set(parts)]
+    bundle = SignalBundle(
+        owner=owner,
+        repo=repo,
+        commit=commit,
+        parts=wanted,
+    )
+
+    if "metadata" in wanted:
+        bundle.repo_data = fetch_repo(owner, repo, ref=ref)
+
+    if "files" in wanted:
+        try:
+            read_result = read_repo_signal_files(
+                owner,
+                repo,
+                fetch_concurrency=fetch_concurrency,
+                backend=backend,
+                ref=ref,
+            )
+        except Exception as e:
+            if on_files_error is None:
+                raise
+            on_files_error(e)
+        else:
+            bundle.tree = [
+                {key: item[key] for key in _TREE_KEYS if key in item}
+                for item in read_result.tree
+            ]
+            bundle.tree_text = read_result.tree_text
+            bundle.files_text = read_result.files_text
+            bundle.key_files = read_result.key_files
+            bundle.blob_shas = read_result.blob_shas
+            bundle.tree_sha = read_result.tree_sha or None
+
+    if "readme" in wanted:
+        bundle.readme = fetch_readme(owner, repo, tree=bundle.tree, ref=ref)
+
+    if "languages" in wanted:
+        bundle.languages = fetch_languages(owner, repo)
+
+    return bundle
+
+
+def _bundle_payload(bundle: SignalBundle) -> dict:
+    return {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "owner": bundle.owner,
+        "repo": bundle.repo,
+        "commit": bundle.commit,
+        "parts": bundle.parts,
+        "repo_data": bundle.repo_data,
+        "readme": bundle.readme,
+        "tree": bundle.tree,
+        "tree_text": bundle.tree_text,
+        "files_text": bundle.files_text,
+        "key_files": bundle.key_files,
+        "blob_shas": bundle.blob_shas,
+        "languages": bundle.languages,
+        "tree_sha": bundle.tree_sha,
+    }
+
+
+def _bundle_from_payload(payload: dict) -> SignalBundle:
+    return SignalBundle(
+        owner=str(payload.get("owner") or ""),
+        repo=str(payload.get("repo") or ""),
+        commit=payload.get("commit"),
+        parts=list(payload.get("parts") or []),
+        repo_data=payload.get("repo_data") or {},
+        readme=payload.get("readme"),
+        tree=payload.get("tree"),
+        tree_text=payload.get("tree_text"),
+        files_text=payload.get("files_text"),
+        key_files=payload.get("key_files") or {},
+        blob_shas=payload.get("blob_shas") or {},
+        languages=payload.get("languages"),
+        tree_sha=payload.get("tree_sha"),
+    )
+
+
+def write_bundle(bundle: SignalBundle, path: str) -> Path:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    payload = _bundle_payload(bundle)
+    data = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+    # No timestamp or file name goes into the gzip header, so identical
+    # signals give a byte-identical bundle that can serve as a fixture.
+    with target.open("wb") as raw:
+        with gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as handle:
+            handle.write(data)
+    return target
+
+
+def read_bundle(path: str) -> SignalBundle:
+    source = Path(path)
+    if not source.is_file():
+        raise RuntimeError(f"No such bundle: {path}")
+
+    try:
+        with gzip.open(str(source), "rb") as handle:
+            payload = json.loads(handle.read().decode("utf-8"))
+    except (OSError, EOFError, ValueError) as e:
+        raise RuntimeError(f"Not an ExplainThisRepo bundle: {path}") from e
+
+    if not isinstance(payload, dict) or payload.get("format") != BUNDLE_FORMAT:
+        raise RuntimeError(f"Not an ExplainThisRepo bundle: {path}")
+
+    version = payload.get("version")
+    if version != BUNDLE_VERSION:
+        raise RuntimeError(
+            f"Unsupported bundle version {version} in {path} "
+            f"(this version reads version {BUNDLE_VERSION})."
+        )
+
+    return _bundle_from_payload(payload)
+
+
+def _tree_store() -> Optional[CacheStore]:
+    return shared_store(TREE_CACHE_NAME, TREE_CACHE_MAX_BYTES)
+
+
+def remember_tree_bundle(bundle: SignalBundle) -> None:
+    # Signals depend only on the root tree, so a fork or mirror that points
+    # at the same tree can be served from whichever repository was read first.
+    store = _tree_store()
+    if store is None or not bundle.tree_sha or bundle.tree is None:
+        return
+
+    payload = _bundle_payload(bundle)
+    data = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    try:
+        store.put(f"tree:{bundle.tree_sha}", zlib.compress(data))
+    except Exception:
+        pass
+
+
+def tree_bundle(tree_sha: str) -> Optional[SignalBundle]:
+    store = _tree_store()
+    if store is None:
+        return None
+
+    try:
+        entry = store.get(f"tree:{tree_sha}")
+        if entry is None:
+            return None
+        payload = json.loads(zlib.decompress(entry.value).decode("utf-8"))
+    except Exception:
+        return None
+
+    if payload.get("version") != BUNDLE_VERSION:
+        return None
+    return _bundle_from_payload(payload)
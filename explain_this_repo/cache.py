@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from explain_this_repo.config import get_cache_dir, load_config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    meta TEXT NOT NULL DEFAULT '{}',
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals (id, bytes)
+    SELECT 0, COALESCE(SUM(size), 0) FROM entries;
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET bytes = bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET bytes = bytes - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+END;
+"""
+
+_BUSY_TIMEOUT_MS = 15_000
+
+# Reads only refresh accessed_at when it is older than this, so hot entries
+# do not turn every lookup into a write.
+_TOUCH_INTERVAL = 60.0
+
+_EVICT_BATCH = 256
+
+# Eviction trims to this fraction of the cap so a full cache does not evict on
+# every single write.
+_EVICT_TARGET_RATIO = 0.9
+
+_caches_enabled = True
+
+
+def disable_caches() -> None:
+    global _caches_enabled
+    _caches_enabled = False
+
+
+def caches_enabled() -> bool:
+    return _caches_enabled
+
+
+def configured_max_bytes(name: str, default: int) -> int:
+    # [cache] in config.toml may override any cap, e.g. blobs_max_mb = 1024.
+    try:
+        section = (load_config() or {}).get("cache", {})
+        value = section.get(f"{name}_max_mb") if isinstance(section, dict) else None
+        if value is not None and float(value) > 0:
+            return int(float(value) * 1024 * 1024)
+    except Exception:
+        pass
+    return default
+
+
+def configured_max_age(name: str) -> Optional[float]:
+    # [cache] max_age_days applies to every cache, {name}_max_age_days to one.
+    try:
+        section = (load_config() or {}).get("cache", {})
+        if not isinstance(section, dict):
+            return None
+        value = section.get(f"{name}_max_age_days", section.get("max_age_days"))
+        if value is not None and float(value) > 0:
+            return float(value) * 24 * 60 * 60
+    except Exception:
+        pass
+    return None
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    key: str
+    value: bytes
+    meta: dict[str, Any]
+    created_at: float
+    accessed_at: float
+    expires_at: Optional[float]
+
+
+@dataclass
+class CacheCounters:
+    hits: int = 0
+    misses: int = 0
+    extra: dict[str, int] = field(default_factory=dict)
+
+    def bump(self, name: str, amount: int = 1) -> None:
+        if name == "hits":
+            self.hits += amount
+        elif name == "misses":
+            self.misses += amount
+        else:
+            self.extra[name] = self.extra.get(name, 0) + amount
+
+
+class CacheStore:
+    # One SQLite database per cache, shared by every process on the host.
+    # WAL lets readers run alongside the single writer, writes take the
+    # write lock up front (BEGIN IMMEDIATE) instead of failing on upgrade,
+    # and every multi-row change is one transaction, so a crash mid-eviction
+    # rolls back to a consistent state.
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int,
+        directory: Optional[Path] = None,
+    ) -> None:
+        self.name = name
+        self.max_bytes = configured_max_bytes(name, max_bytes)
+        self.path = (directory or get_cache_dir()) / f"{name}.sqlite3"
+        self.counters = CacheCounters()
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._unflushed: dict[str, int] = {}
+        atexit.register(self.flush_counters)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path),
+                timeout=_BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+            )
+            conn.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(f"BEGIN IMMEDIATE;{_SCHEMA}COMMIT;")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(
+        self, conn: Optional[sqlite3.Connection] = None
+    ) -> Iterator[sqlite3.Connection]:
+        conn = conn or self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._counter_lock:
+            self.counters.bump(name, amount)
+            self._unflushed[name] = self._unflushed.get(name, 0) + amount
+
+    def flush_counters(self) -> None:
+        # Lifetime totals live in the database so `cache stats` can report
+        # hit ratios across runs; one write per run is enough.
+        with self._counter_lock:
+            pending, self._unflushed = self._unflushed, {}
+        if not pending:
+            return
+
+        try:
+            with self._transaction() as conn:
+                conn.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    list(pending.items()),
+                )
+        except sqlite3.Error:
+            pass
+
+    def lifetime_counters(self) -> dict[str, int]:
+        rows = self._connect().execute("SELECT name, value FROM counters").fetchall()
+        totals = {name: int(value) for name, value in rows}
+        with self._counter_lock:
+            for name, value in self._unflushed.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, meta, created_at, accessed_at, expires_at "
+            "FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, meta, created_at, accessed_at, expires_at = row
+        now = time.time()
+
+        if expires_at is not None and expires_at <= now:
+            # Only delete the row this read saw; another process may have
+            # stored a fresh one since.
+            conn.execute(
+                "DELETE FROM entries WHERE key = ? AND expires_at = ?",
+                (key, expires_at),
+            )
+            return None
+
+        if now - accessed_at > _TOUCH_INTERVAL:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        else:
+            now = accessed_at
+
+        try:
+            parsed_meta = json.loads(meta) if meta else {}
+        except ValueError:
+            parsed_meta = {}
+
+        return CacheEntry(
+            key=key,
+            value=bytes(value),
+            meta=parsed_meta,
+            created_at=created_at,
+            accessed_at=now,
+            expires_at=expires_at,
+        )
+
+    def put(
+        self,
+        key: str,
+        value: bytes,
+        meta: Optional[dict[str, Any]] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        if len(value) > self.max_bytes:
+            return
+
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        # A single upsert statement is atomic on its own; readers in other
+        # processes see either the old row or the new one.
+        self._connect().execute(
+            "INSERT INTO entries "
+            "(key, value, meta, size, created_at, accessed_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = excluded.value, meta = excluded.meta, size = excluded.size, "
+            "created_at = excluded.created_at, accessed_at = excluded.accessed_at, "
+            "expires_at = excluded.expires_at",
+            (
+                key,
+                sqlite3.Binary(value),
+                json.dumps(meta or {}, sort_keys=True),
+                len(value),
+                now,
+                now,
+                expires_at,
+            ),
+        )
+        self.evict()
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def entry_count(self) -> int:
+        row = self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return int(row[0])
+
+    def created_times(self) -> list[float]:
+        rows = self._connect().execute("SELECT created_at FROM entries").fetchall()
+        return [float(created_at) for (created_at,) in rows]
+
+    def prune(self, max_age: Optional[float] = None) -> int:
+        # Expired entries always go; with max_age, so does anything that has
+        # not been read for that long. The size cap is enforced afterwards.
+        now = time.time()
+        with self._transaction() as conn:
+            removed = conn.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now,),
+            ).rowcount
+            if max_age is not None:
+                removed += conn.execute(
+                    "DELETE FROM entries WHERE accessed_at < ?",
+                    (now - max_age,),
+                ).rowcount
+
+        if removed:
+            self.count("evictions", removed)
+        return removed + self.evict()
+
+    def clear(self) -> int:
+        with self._transaction() as conn:
+            removed = conn.execute("DELETE FROM entries").rowcount
+            conn.execute("DELETE FROM counters")
+        with self._counter_lock:
+            self._unflushed = {}
+        self._connect().execute("VACUUM")
+        return removed
+
+    def merge(self, path: Path) -> int:
+        # Entries from another cache database win only when they are newer,
+        # so importing an older archive never rolls anything back.
+        conn = self._connect()
+        conn.execute("ATTACH DATABASE ? AS incoming", (str(path),))
+        try:
+            with self._transaction(conn):
+                merged = conn.execute(
+                    "INSERT INTO entries "
+                    "(key, value, meta, size, created_at, accessed_at, expires_at) "
+                    "SELECT key, value, meta, size, created_at, accessed_at, "
+                    "expires_at "
+                    "FROM incoming.entries WHERE true "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "value = excluded.value, meta = excluded.meta, "
+                    "size = excluded.size, created_at = excluded.created_at, "
+                    "accessed_at = excluded.accessed_at, "
+                    "expires_at = excluded.expires_at "
+                    "WHERE excluded.created_at > entries.created_at"
+                ).rowcount
+        finally:
+            conn.execute("DETACH DATABASE incoming")
+
+        self.evict()
+        return merged
+
+    def total_bytes(self) -> int:
+        row = (
+            self._connect().execute("SELECT bytes FROM totals WHERE id = 0").fetchone()
+        )
+        return int(row[0]) if row else 0
+
+    def evict(self) -> int:
+        # The running total is kept by triggers, so the common case is one
+        # indexed read and no lock at all.
+        if self.total_bytes() <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        removed = 0
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+            while self.total_bytes() > target:
+                keys = conn.execute(
+                    "SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?",
+                    (_EVICT_BATCH,),
+                ).fetchall()
+                if not keys:
+                    break
+                for (key,) in keys:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    removed += 1
+                    if self.total_bytes() <= target:
+                        break
+
+        if removed:
+            self.count("evictions", removed)
+        return removed
+
+
+_shared_stores: dict[str, CacheStore] = {}
+_shared_stores_lock = threading.Lock()
+
+
+def shared_store(name: str, max_bytes: int) -> Optional[CacheStore]:
+    # One store per cache for the whole process, opened on first use.
+    if not caches_enabled():
+        return None
+
+    with _shared_stores_lock:
+        store = _shared_stores.get(name)
+        if store is None:
+            store = CacheStore(name, max_bytes)
+            _shared_stores[name] = store
+        return store
+
+
+def opened_store(name: str) -> Optional[CacheStore]:
+    # The shared store if this process has used it, without opening it.
+    with _shared_stores_lock:
+        return _shared_stores.get(name)
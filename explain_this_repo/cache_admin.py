@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from explain_this_repo.blob_cache import BLOB_CACHE_MAX_BYTES, BLOB_CACHE_NAME
+from explain_this_repo.bundle import TREE_CACHE_MAX_BYTES, TREE_CACHE_NAME
+from explain_this_repo.cache import CacheStore, configured_max_age
+from explain_this_repo.config import get_cache_dir
+from explain_this_repo.github import NEGATIVE_CACHE_MAX_BYTES, NEGATIVE_CACHE_NAME
+from explain_this_repo.http_cache import HTTP_CACHE_MAX_BYTES, HTTP_CACHE_NAME
+from explain_this_repo.llm_cache import LLM_CACHE_MAX_BYTES, LLM_CACHE_NAME
+from explain_this_repo.manifest import MANIFEST_CACHE_MAX_BYTES, MANIFEST_CACHE_NAME
+from explain_this_repo.scan_index import SCAN_INDEX_CACHE_NAME, SCAN_INDEX_MAX_BYTES
+
+CACHE_COMMANDS = ("stats", "prune", "clear", "export", "import")
+
+_KNOWN_CACHES = {
+    HTTP_CACHE_NAME: HTTP_CACHE_MAX_BYTES,
+    NEGATIVE_CACHE_NAME: NEGATIVE_CACHE_MAX_BYTES,
+    BLOB_CACHE_NAME: BLOB_CACHE_MAX_BYTES,
+    LLM_CACHE_NAME: LLM_CACHE_MAX_BYTES,
+    MANIFEST_CACHE_NAME: MANIFEST_CACHE_MAX_BYTES,
+    SCAN_INDEX_CACHE_NAME: SCAN_INDEX_MAX_BYTES,
+    TREE_CACHE_NAME: TREE_CACHE_MAX_BYTES,
+}
+_UNKNOWN_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_ARCHIVE_MANIFEST = "explainthisrepo-cache.json"
+_ARCHIVE_VERSION = 1
+_CACHE_FILE_RE = re.compile(r"^[a-z0-9_]+\.sqlite3$")
+
+_AGE_BUCKETS = (
+    ("<1h", 60 * 60),
+    ("<1d", 24 * 60 * 60),
+    ("<7d", 7 * 24 * 60 * 60),
+    ("<30d", 30 * 24 * 60 * 60),
+    ("older", float("inf")),
+)
+
+
+def _cache_names(directory: Path) -> list[str]:
+    found = {path.stem for path in directory.glob("*.sqlite3")}
+    return sorted(found)
+
+
+def _open_store(name: str, directory: Path) -> CacheStore:
+    return CacheStore(
+        name,
+        _KNOWN_CACHES.get(name, _UNKNOWN_CACHE_MAX_BYTES),
+        directory=directory,
+    )
+
+
+def _selected(names: list[str], directory: Path) -> list[str]:
+    existing = _cache_names(directory)
+    if not names:
+        return existing
+
+    unknown = [name for name in names if name not in existing]
+    if unknown:
+        raise RuntimeError(
+            f"Unknown cache '{unknown[0]}'. "
+            f"Available caches: {', '.join(existing) or 'none'}"
+        )
+    return names
+
+
+def _format_mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _age_histogram(created: list[float], now: float) -> str:
+    counts = [0] * len(_AGE_BUCKETS)
+    for created_at in created:
+        age = now - created_at
+        for i, (_, limit) in enumerate(_AGE_BUCKETS):
+            if age < limit:
+                counts[i] += 1
+                break
+    return ", ".join(
+        f"{label} {count}" for (label, _), count in zip(_AGE_BUCKETS, counts)
+    )
+
+
+def _run_stats(args, directory: Path) -> int:
+    names = _selected(args.caches, directory)
+    if not names:
+        print(f"No caches in {directory}")
+        return 0
+
+    now = time.time()
+    print(f"Caches in {directory}:")
+    for name in names:
+        store = _open_store(name, directory)
+        counters = store.lifetime_counters()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        ratio = f"{hits * 100 // lookups}%" if lookups else "n/a"
+
+        print(f"\n{name}:")
+        print(f"- entries: {store.entry_count()}")
+        print(
+            f"- size: {_format_mb(store.total_bytes())} "
+            f"of {_format_mb(store.max_bytes)}"
+        )
+        print(f"- hit ratio: {ratio} ({hits} hit(s), {misses} miss(es))")
+        if counters.get("evictions"):
+            print(f"- evicted: {counters['evictions']}")
+        print(f"- age: {_age_histogram(store.created_times(), now)}")
+    return 0
+
+
+def _run_prune(args, directory: Path) -> int:
+    total = 0
+    for name in _selected(args.caches, directory):
+        store = _open_store(name, directory)
+        if args.max_mb is not None:
+            store.max_bytes = int(args.max_mb * 1024 * 1024)
+
+        max_age = configured_max_age(name)
+        if args.max_age_days is not None:
+            max_age = args.max_age_days * 24 * 60 * 60
+
+        removed = store.prune(max_age)
+        total += removed
+        print(f"{name}: removed {removed} entr{'y' if removed == 1 else 'ies'}")
+
+    print(f"Pruned {total} entr{'y' if total == 1 else 'ies'}")
+    return 0
+
+
+def _run_clear(args, directory: Path) -> int:
+    total = 0
+    for name in _selected(args.caches, directory):
+        removed = _open_store(name, directory).clear()
+        total += removed
+        print(f"{name}: cleared {removed} entr{'y' if removed == 1 else 'ies'}")
+
+    print(f"Cleared {total} entr{'y' if total == 1 else 'ies'}")
+    return 0
+
+
+def _run_export(args, directory: Path) -> int:
+    names = _selected(args.caches, directory)
+    archive = Path(args.archive)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = Path(tmp)
+        for name in names:
+            # The backup API gives a consistent snapshot even while another
+            # run is writing to the same database.
+            source = sqlite3.connect(str(directory / f"{name}.sqlite3"))
+            target = sqlite3.connect(str(staging / f"{name}.sqlite3"))
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+
+        (staging / _ARCHIVE_MANIFEST).write_text(
+            json.dumps(
+                {
+                    "version": _ARCHIVE_VERSION,
+                    "created_at": time.time(),
+                    "caches": names,
+                }
+            ),
+            encoding="utf-8",
+        )
+
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        with tarfile.open(str(archive), "w:gz") as tar:
+            tar.add(str(staging / _ARCHIVE_MANIFEST), arcname=_ARCHIVE_MANIFEST)
+            for name in names:
+                filename = f"{name}.sqlite3"
+                tar.add(str(staging / filename), arcname=filename)
+
+    print(f"Exported {len(names)} cache(s) to {archive}")
+    return 0
+
+
+def _read_archive_manifest(tar: tarfile.TarFile) -> dict:
+    try:
+        member = tar.getmember(_ARCHIVE_MANIFEST)
+        handle = tar.extractfile(member)
+        manifest = json.loads(handle.read().decode("utf-8")) if handle else None
+    except (KeyError, ValueError) as e:
+        raise RuntimeError("Not an ExplainThisRepo cache archive.") from e
+
+    if not isinstance(manifest, dict) or manifest.get("version") != _ARCHIVE_VERSION:
+        raise RuntimeError("Unsupported cache archive version.")
+    return manifest
+
+
+def _run_import(args, directory: Path) -> int:
+    archive = Path(args.archive)
+    if not archive.is_file():
+        raise RuntimeError(f"No such archive: {archive}")
+
+    try:
+        tar = tarfile.open(str(archive), "r:gz")
+    except (tarfile.TarError, OSError) as e:
+        raise RuntimeError(f"Could not read cache archive: {e}") from e
+
+    imported = 0
+    with tar, tempfile.TemporaryDirectory() as tmp:
+        _read_archive_manifest(tar)
+        for member in tar.getmembers():
+            # Only flat database files are taken; nothing in the archive can
+            # choose where it is written.
+            if not member.isfile() or not _CACHE_FILE_RE.match(member.name):
+                continue
+            name = member.name[: -len(".sqlite3")]
+            if args.caches and name not in args.caches:
+                continue
+
+            staged = Path(tmp) / member.name
+            source = tar.extractfile(member)
+            if source is None:
+                continue
+            with source, staged.open("wb") as target:
+                shutil.copyfileobj(source, target)
+
+            try:
+                merged = _open_store(name, directory).merge(staged)
+            except sqlite3.Error as e:
+                print(f"{name}: skipped ({e})")
+                continue
+
+            imported += 1
+            print(f"{name}: merged {merged} entr{'y' if merged == 1 else 'ies'}")
+
+    print(f"Imported {imported} cache(s) from {archive}")
+    return 0
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="explainthisrepo cache",
+        description="Inspect and manage the on-disk caches",
+    )
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    stats = sub.add_parser(
+        "stats", help="Show entries, size, hit ratio and age per cache"
+    )
+    stats.add_argument("caches", nargs="*", help="Caches to show (default: all)")
+
+    prune = sub.add_parser(
+        "prune", help="Drop expired and stale entries and enforce size caps"
+    )
+    prune.add_argument("caches", nargs="*", help="Caches to prune (default: all)")
+    prune.add_argument(
+        "--max-age-days",
+        type=float,
+        default=None,
+        help="Drop entries not read for this many days (default: [cache] max_age_days)",
+    )
+    prune.add_argument(
+        "--max-mb",
+        type=float,
+        default=None,
+        help="Shrink each cache to this many megabytes (default: its configured cap)",
+    )
+
+    clear = sub.add_parser("clear", help="Delete every entry")
+    clear.add_argument("caches", nargs="*", help="Caches to clear (default: all)")
+
+    export = sub.add_parser("export", help="Write caches to a single .tar.gz archive")
+    export.add_argument("archive", help="Archive path to write")
+    export.add_argument("caches", nargs="*", help="Caches to export (default: all)")
+
+    import_ = sub.add_parser("import", help="Merge caches from an exported archive")
+    import_.add_argument("archive", help="Archive path to read")
+    import_.add_argument("caches", nargs="*", help="Caches to import (default: all)")
+
+    return parser
+
+
+def run_cache_command(argv: list[str], directory: Optional[Path] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    directory = directory or get_cache_dir()
+
+    handlers = {
+        "stats": _run_stats,
+        "prune": _run_prune,
+        "clear": _run_clear,
+        "export": _run_export,
+        "import": _run_import,
+    }
+
+    try:
+        return handlers[args.action](args, directory)
+    except (RuntimeError, OSError, sqlite3.Error) as e:
+        print(f"error: {e}")
+        return 1
@@ -6,23 +6,62 @@ import platform
 import re
 import sys
 import urllib.request
+from dataclasses import replace
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import version as pkg_version
 from urllib.parse import urlparse
 
 from rich.console import Console
 
+from explain_this_repo.blob_cache import blob_counters
+from explain_this_repo.bundle import (
+    BUNDLE_PARTS,
+    BUNDLE_SUFFIX,
+    SignalBundle,
+    fetch_signal_bundle,
+    read_bundle,
+    remember_tree_bundle,
+    tree_bundle,
+    write_bundle,
+)
+from explain_this_repo.cache import disable_caches
+from explain_this_repo.cache_admin import CACHE_COMMANDS, run_cache_command
 from explain_this_repo.file_reader import read_local_file
-from explain_this_repo.generate import generate_explanation
+from explain_this_repo.generate import (
+    cached_explanation,
+    generate_explanation,
+    generator_fingerprint,
+    remember_explanation,
+)
 from explain_this_repo.github import (
+    client_stats,
+    configure_client,
     fetch_directory_contents,
+    fetch_file_entry,
     fetch_file_result,
-    fetch_languages,
     fetch_readme,
     fetch_repo,
+    fetch_tree_listing,
+    rate_limit_budget,
+    resolve_commit,
+)
+from explain_this_repo.llm_cache import (
+    llm_counters,
+    refresh_requested,
+    refresh_responses,
 )
 from explain_this_repo.local_reader import read_local_repo_signal_files
+from explain_this_repo.manifest import (
+    RunManifest,
+    can_patch,
+    changed_files,
+    load_manifest,
+    render_diffs,
+    save_manifest,
+    text_sha,
+)
 from explain_this_repo.prompt import (
+    build_digest_prompt,
     build_directory_prompt,
     build_directory_quick_prompt,
     build_directory_simple_prompt,
@@ -33,8 +72,13 @@ from explain_this_repo.prompt import (
     build_quick_prompt,
     build_repo_map_prompt,
     build_simple_prompt,
+    build_update_prompt,
+)
+from explain_this_repo.repo_reader import (
+    DEFAULT_FETCH_CONCURRENCY,
+    FETCH_BACKENDS,
+    read_repo_signal_files,
 )
-from explain_this_repo.repo_reader import read_repo_signal_files
 from explain_this_repo.stack_detector import detect_stack
 from explain_this_repo.stack_printer import print_stack
 from explain_this_repo.writer import write_output
@@ -238,17 +282,80 @@ def run_doctor(llm_override: str | None = None) -> int:
     return 0 if (ok_gh and provider_ok) else 1
 
 
-def safe_read_repo_files(owner: str, repo: str):
+def _run_mode_name(args) -> str:
+    for name in ("quick", "simple", "detailed", "stack", "map"):
+        if getattr(args, name, False):
+            return name
+    return "default"
+
+
+def print_run_stats(mode: str) -> None:
+    stats = client_stats()
+
+    print(f"\nrun stats ({mode}):", file=sys.stderr)
+    print(f"- github network calls: {stats.requests}", file=sys.stderr)
+    print(
+        f"- github duplicate calls avoided: {stats.deduplicated}",
+        file=sys.stderr,
+    )
+    print(f"- github connections opened: {stats.connections}", file=sys.stderr)
+    print(f"- github connections reused: {stats.reused}", file=sys.stderr)
+    print(
+        f"- http cache: {stats.cache_hits} hit(s) "
+        f"({stats.cache_revalidated} revalidated), {stats.cache_misses} miss(es)",
+        file=sys.stderr,
+    )
+    llm_hits, llm_misses = llm_counters()
+    llm_lookups = llm_hits + llm_misses
+    if llm_lookups:
+        print(
+            f"- llm cache: {llm_hits} hit(s), {llm_misses} miss(es) "
+            f"({llm_hits * 100 // llm_lookups}% hit rate)",
+            file=sys.stderr,
+        )
+    blob_hits, blob_misses = blob_counters()
+    print(
+        f"- blob cache: {blob_hits} hit(s), {blob_misses} miss(es)",
+        file=sys.stderr,
+    )
+
+    budget = rate_limit_budget()
+    if budget is not None:
+        mins = int((budget.seconds_until_reset() + 59) // 60)
+        print(
+            f"- github rate limit: {budget.remaining}/{budget.limit} left, "
+            f"resets in ~{mins} minute(s)",
+            file=sys.stderr,
+        )
+
+
+def safe_read_repo_files(
+    owner: str,
+    repo: str,
+    fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    fetch_backend: str = "auto",
+    ref: str | None = None,
+):
     try:
-        return read_repo_signal_files(owner, repo)
+        return read_repo_signal_files(
+            owner,
+            repo,
+            fetch_concurrency=fetch_concurrency,
+            backend=fetch_backend,
+            ref=ref,
+        )
     except Exception as e:
         print(f"warning: could not read repository files: {e}")
         return None
 
 
-def generate_with_exit(prompt: str, llm: str | None = None) -> str:
+def generate_with_exit(
+    prompt: str,
+    llm: str | None = None,
+    subject: str | None = None,
+) -> str:
     try:
-        return generate_explanation(prompt, provider_override=llm)
+        return generate_explanation(prompt, provider_override=llm, subject=subject)
     except ValueError as e:
         print(f"error: {e}")
         print("\nfix:")
@@ -272,6 +379,90 @@ def generate_with_exit(prompt: str, llm: str | None = None) -> str:
         raise SystemExit(1)
 
 
+def generate_tracked(
+    prompt: str,
+    *,
+    llm: str | None,
+    subject: str | None,
+    manifest_key: str | None,
+    commit: str | None,
+    repo_data: dict,
+    readme: str | None,
+    read_result,
+    output_path: str,
+    status: str,
+) -> str:
+    # The manifest from the last run of this repo and mode says which signal
+    # files it was built from; unchanged inputs reuse its output and a few
+    # changed files only ask the LLM to patch it.
+    files = read_result.blob_shas if read_result else {}
+    readme_sha = text_sha(readme)
+    metadata_sha = text_sha(
+        f"{repo_data.get('full_name')}\n{repo_data.get('description') or ''}"
+    )
+    # Added, removed or renamed files change the tree the prompt shows even
+    # when every signal file is untouched.
+    tree_text_sha = text_sha(read_result.tree_text if read_result else None)
+    prompt_sha = text_sha(prompt)
+
+    previous = None
+    if manifest_key and not refresh_requested():
+        previous = load_manifest(manifest_key)
+
+    output = None
+    if previous is not None and previous.output:
+        changed = changed_files(previous, files)
+        same_context = (
+            previous.readme_sha == readme_sha
+            and previous.metadata_sha == metadata_sha
+            and previous.tree_text_sha == tree_text_sha
+        )
+
+        if previous.prompt_sha == prompt_sha or (same_context and not changed):
+            print(
+                f"No signal files changed since commit {previous.commit[:12]}, "
+                "reusing the previous explanation"
+            )
+            output = previous.output
+            if subject:
+                remember_explanation(subject, output, provider_override=llm)
+        elif same_context and can_patch(changed, len(files)):
+            diffs_text = render_diffs(previous.files, files, changed)
+            if diffs_text:
+                update_prompt = build_update_prompt(
+                    repo_name=repo_data.get("full_name"),
+                    description=repo_data.get("description"),
+                    previous=previous.output,
+                    diffs_text=diffs_text,
+                )
+                with console.status(
+                    f"Updating explanation for {len(changed)} changed file(s)...",
+                    spinner="dots",
+                ):
+                    output = generate_with_exit(update_prompt, llm=llm, subject=subject)
+
+    if output is None:
+        with console.status(status, spinner="dots"):
+            output = generate_with_exit(prompt, llm=llm, subject=subject)
+
+    if manifest_key and commit:
+        save_manifest(
+            manifest_key,
+            RunManifest(
+                commit=commit,
+                files=files,
+                readme_sha=readme_sha,
+                metadata_sha=metadata_sha,
+                tree_text_sha=tree_text_sha,
+                prompt_sha=prompt_sha,
+                output_path=os.path.abspath(output_path),
+                output=output,
+            ),
+        )
+
+    return output
+
+
 def _looks_like_github_file_target(target: str) -> bool:
     value = target.strip()
     if not value:
@@ -475,7 +666,18 @@ def _handle_github_file_mode(
 
     try:
         with console.status(f"Fetching {owner}/{repo}/{file_path}...", spinner="dots"):
-            read_result = fetch_file_result(owner, repo, file_path)
+            # The entry's blob SHA lets a file seen before, in any repository,
+            # come straight from the blob cache.
+            entry = fetch_file_entry(owner, repo, file_path) or {}
+            size = entry.get("size")
+            sha = entry.get("sha")
+            read_result = fetch_file_result(
+                owner,
+                repo,
+                file_path,
+                size_bytes=size if isinstance(size, int) else None,
+                sha=sha if isinstance(sha, str) else None,
+            )
     except Exception as e:
         print(f"error: {e}")
         raise SystemExit(1)
@@ -627,14 +829,39 @@ def _handle_github_directory_mode(
     print(f"Open {args.output} to read it.")
 
 
+def _local_parts(args) -> tuple[str, ...]:
+    if args.quick:
+        return ("readme",)
+    if args.simple:
+        return ("top_level",)
+    if args.stack:
+        return ("tree", "key_files")
+    if args.map:
+        return ("readme", "tree", "files")
+    return ("tree", "files")
+
+
+def _read_local_repo(args, local_path: str):
+    with console.status("Reading repository files...", spinner="dots"):
+        read_result = read_local_repo_signal_files(
+            local_path, rescan=args.rescan, parts=_local_parts(args)
+        )
+
+    if read_result.truncated:
+        print(
+            f"warning: stopped scanning early ({read_result.truncation_reason}); "
+            "the file tree is partial"
+        )
+    return read_result
+
+
 def _handle_directory_mode(args, llm: str | None) -> None:
     local_path = os.path.abspath(args.repository)
 
     print(f"Analyzing local directory: {args.repository}")
 
     if args.stack:
-        with console.status("Reading repository files...", spinner="dots"):
-            read_result = read_local_repo_signal_files(local_path)
+        read_result = _read_local_repo(args, local_path)
 
         report = detect_stack(
             languages={},
@@ -646,21 +873,12 @@ def _handle_directory_mode(args, llm: str | None) -> None:
         return
 
     if args.map:
-        with console.status("Reading repository files...", spinner="dots"):
-            read_result = read_local_repo_signal_files(local_path)
-
-        readme_content = read_result.key_files.get(
-            next(
-                (k for k in read_result.key_files if k.lower().startswith("readme")),
-                "",
-            ),
-            None,
-        )
+        read_result = _read_local_repo(args, local_path)
 
         prompt = build_repo_map_prompt(
             repo_name=local_path,
             description=None,
-            readme=readme_content,
+            readme=read_result.readme,
             tree_text=read_result.tree_text,
             files_text=read_result.files_text,
         )
@@ -680,21 +898,12 @@ def _handle_directory_mode(args, llm: str | None) -> None:
         return
 
     if args.quick:
-        with console.status("Reading repository files...", spinner="dots"):
-            read_result = read_local_repo_signal_files(local_path)
-
-        readme_content = read_result.key_files.get(
-            next(
-                (k for k in read_result.key_files if k.lower().startswith("readme")),
-                "",
-            ),
-            None,
-        )
+        read_result = _read_local_repo(args, local_path)
 
         prompt = build_quick_prompt(
             repo_name=local_path,
             description=None,
-            readme=readme_content,
+            readme=read_result.readme,
         )
 
         with console.status("Generating explanation...", spinner="dots"):
@@ -705,8 +914,7 @@ def _handle_directory_mode(args, llm: str | None) -> None:
         return
 
     if args.simple:
-        with console.status("Reading repository files...", spinner="dots"):
-            read_result = read_local_repo_signal_files(local_path)
+        read_result = _read_local_repo(args, local_path)
 
         prompt = build_simple_prompt(
             repo_name=local_path,
@@ -722,8 +930,7 @@ def _handle_directory_mode(args, llm: str | None) -> None:
         print(output.strip())
         return
 
-    with console.status("Reading repository files...", spinner="dots"):
-        read_result = read_local_repo_signal_files(local_path)
+    read_result = _read_local_repo(args, local_path)
 
     prompt = build_prompt(
         repo_name=local_path,
@@ -747,129 +954,528 @@ def _handle_directory_mode(args, llm: str | None) -> None:
     print(f"Open {args.output} to read it.")
 
 
-def _handle_github_mode(args, llm: str | None) -> None:
+def _repo_digest(
+    args,
+    owner: str,
+    repo: str,
+    commit: str | None,
+    ref: str | None,
+    repo_data: dict,
+    llm: str | None,
+) -> str:
+    # One digest per commit condenses README, tree and files; every mode's
+    # prompt is then built from it, so later modes skip reading the repo.
+    subject = f"github:{owner}/{repo}@{commit}:digest".lower() if commit else None
+    if subject:
+        digest = cached_explanation(subject, provider_override=llm)
+        if digest is not None:
+            return digest
+
     try:
-        owner, repo = resolve_repo_target(args.repository)
-    except ValueError as e:
+        with console.status(f"Fetching {owner}/{repo}...", spinner="dots"):
+            readme = fetch_readme(owner, repo, ref=ref)
+    except Exception as e:
         print(f"error: {e}")
         raise SystemExit(1)
 
+    with console.status("Reading repository files...", spinner="dots"):
+        read_result = safe_read_repo_files(
+            owner,
+            repo,
+            fetch_concurrency=args.fetch_concurrency,
+            fetch_backend=args.fetch_backend,
+            ref=ref,
+        )
+
+    prompt = build_digest_prompt(
+        repo_name=repo_data.get("full_name"),
+        description=repo_data.get("description"),
+        readme=readme,
+        tree_text=read_result.tree_text if read_result else None,
+        files_text=read_result.files_text if read_result else None,
+    )
+
+    with console.status("Condensing repository signals...", spinner="dots"):
+        return generate_with_exit(prompt, llm=llm, subject=subject)
+
+
+def _digest_mode_prompt(args, repo_data: dict, digest: str) -> str:
+    repo_name = repo_data.get("full_name")
+    description = repo_data.get("description")
+
+    if args.map:
+        return build_repo_map_prompt(
+            repo_name=repo_name, description=description, readme=None, digest=digest
+        )
+    if args.quick:
+        return build_quick_prompt(
+            repo_name=repo_name, description=description, readme=None, digest=digest
+        )
+    if args.simple:
+        return build_simple_prompt(
+            repo_name=repo_name, description=description, readme=None, digest=digest
+        )
+    return build_prompt(
+        repo_name=repo_name,
+        description=description,
+        readme=None,
+        detailed=args.detailed,
+        digest=digest,
+    )
+
+
+def _bundle_parts(args) -> tuple[str, ...]:
     if args.stack:
-        try:
-            with console.status(f"Fetching {owner}/{repo}...", spinner="dots"):
-                read_result = read_repo_signal_files(owner, repo)
-                languages = fetch_languages(owner, repo)
-        except Exception as e:
-            print(f"error: {e}")
-            raise SystemExit(1)
+        return ("files", "languages")
+    if args.quick:
+        return ("metadata", "readme")
+    return ("metadata", "readme", "files")
 
-        report = detect_stack(
-            languages=languages,
-            tree=read_result.tree,
-            key_files=read_result.key_files,
+
+def _bundle_prompt(args, bundle: SignalBundle) -> str:
+    repo_name = bundle.repo_data.get("full_name")
+    description = bundle.repo_data.get("description")
+
+    if args.map:
+        return build_repo_map_prompt(
+            repo_name=repo_name,
+            description=description,
+            readme=bundle.readme,
+            tree_text=bundle.tree_text,
+            files_text=bundle.files_text,
+        )
+
+    if args.quick:
+        return build_quick_prompt(
+            repo_name=repo_name,
+            description=description,
+            readme=bundle.readme,
+        )
+
+    if args.simple:
+        return build_simple_prompt(
+            repo_name=repo_name,
+            description=description,
+            readme=bundle.readme,
+            tree_text=bundle.tree_text,
+        )
+
+    return build_prompt(
+        repo_name=repo_name,
+        description=description,
+        readme=bundle.readme,
+        detailed=args.detailed,
+        tree_text=bundle.tree_text,
+        files_text=bundle.files_text,
+    )
+
+
+def _explain_bundle(
+    args,
+    llm: str | None,
+    bundle: SignalBundle,
+    subject: str | None,
+    manifest_key: str | None,
+) -> str:
+    prompt = _bundle_prompt(args, bundle)
+
+    if args.quick or args.simple:
+        with console.status("Generating explanation...", spinner="dots"):
+            output = generate_with_exit(prompt, llm=llm, subject=subject)
+    else:
+        output = generate_tracked(
+            prompt,
+            llm=llm,
+            subject=subject,
+            manifest_key=manifest_key,
+            commit=bundle.commit,
+            repo_data=bundle.repo_data,
+            readme=bundle.readme,
+            read_result=bundle.read_result,
+            output_path=_bundle_output_path(args),
+            status=(
+                "Generating repo map..." if args.map else "Generating explanation..."
+            ),
+        )
+
+    _remember_tree(args, llm, bundle, output)
+    return output
+
+
+def _bundle_output_path(args) -> str:
+    return _resolve_mode_output(args, "REPO_MAP.md") if args.map else args.output
+
+
+def _remember_tree(args, llm: str | None, bundle: SignalBundle, output: str) -> None:
+    if not bundle.tree_sha or not bundle.commit or bundle.read_result is None:
+        return
+
+    source = tree_bundle(bundle.tree_sha)
+    if source is None:
+        remember_tree_bundle(bundle)
+        source = bundle
+
+    output = _rename_repo(output, _repo_full_name(bundle), _repo_full_name(source))
+    remember_explanation(_tree_subject(args, source), output, provider_override=llm)
+
+
+def _explain_from_identical_tree(
+    args,
+    llm: str | None,
+    target: SignalBundle,
+    subject: str | None,
+    manifest_key: str | None,
+) -> str | None:
+    # Forks usually sit on exactly their parent's root tree. When that tree
+    # was explained before, its signals and explanation carry over and only
+    # the repository metadata changes.
+    if not target.repo_data.get("fork") or not target.tree_sha:
+        return None
+
+    source = tree_bundle(target.tree_sha)
+    if source is None:
+        return None
+
+    output = cached_explanation(_tree_subject(args, source), provider_override=llm)
+    if output is None:
+        return None
+
+    source_name = _repo_full_name(source)
+    target_name = _repo_full_name(target)
+    print(f"{target_name} has the same tree as {source_name}, reusing its explanation")
+    output = _rename_repo(output, source_name, target_name)
+
+    if subject:
+        remember_explanation(subject, output, provider_override=llm)
+
+    if manifest_key and target.commit and not (args.quick or args.simple):
+        bundle = replace(
+            source,
+            owner=target.owner,
+            repo=target.repo,
+            commit=target.commit,
+            repo_data=target.repo_data,
         )
+        read_result = bundle.read_result
+        save_manifest(
+            manifest_key,
+            RunManifest(
+                commit=target.commit,
+                files=read_result.blob_shas if read_result else {},
+                readme_sha=text_sha(bundle.readme),
+                metadata_sha=text_sha(
+                    f"{target_name}\n{bundle.repo_data.get('description') or ''}"
+                ),
+                tree_text_sha=text_sha(read_result.tree_text if read_result else None),
+                prompt_sha=text_sha(_bundle_prompt(args, bundle)),
+                output_path=os.path.abspath(_bundle_output_path(args)),
+                output=output,
+            ),
+        )
+
+    return output
+
+
+def _fork_explanation(
+    args,
+    llm: str | None,
+    owner: str,
+    repo: str,
+    commit: str,
+    subject: str | None,
+    manifest_key: str | None,
+) -> str | None:
+    try:
+        repo_data = fetch_repo(owner, repo, ref=commit)
+        if not repo_data.get("fork"):
+            return None
+        # Pinned to a commit, this listing is replayed from cache by the
+        # reader later, so a miss costs nothing extra.
+        tree_sha = fetch_tree_listing(owner, repo, ref=commit).sha
+    except Exception:
+        return None
 
-        print_stack(report, f"{owner}/{repo}", "")
+    target = SignalBundle(
+        owner=owner,
+        repo=repo,
+        commit=commit,
+        repo_data=repo_data,
+        tree_sha=tree_sha or None,
+    )
+    return _explain_from_identical_tree(args, llm, target, subject, manifest_key)
+
+
+def _print_bundle_stack(bundle: SignalBundle) -> None:
+    report = detect_stack(
+        languages=bundle.languages or {},
+        tree=bundle.tree or [],
+        key_files=bundle.key_files,
+    )
+    print_stack(report, f"{bundle.owner}/{bundle.repo}", "")
+
+
+def _write_mode_output(args, output: str) -> None:
+    if args.quick:
+        print("Quick summary 🎉")
+        print(output.strip())
+        return
+
+    if args.simple:
+        print("Simple summary 🎉")
+        print(output.strip())
         return
 
     if args.map:
+        output_path = _resolve_mode_output(args, "REPO_MAP.md")
+        closing = f"Open {output_path} to navigate the codebase."
+    else:
+        output_path = args.output
+        closing = f"Open {output_path} to read it."
+
+    print(f"Writing {output_path}...")
+    write_output(output, output_path)
+
+    word_count = len(output.split())
+    print(f"{output_path} generated successfully 🎉")
+    print(f"Words: {word_count}")
+    print(f"Location: {os.path.abspath(output_path)}")
+    print(closing)
+
+
+def _run_keys(
+    args,
+    owner: str,
+    repo: str,
+    commit: str | None,
+    llm: str | None,
+) -> tuple[str | None, str | None]:
+    if not commit:
+        return None, None
+
+    mode = _run_mode_name(args)
+    pipeline = "+digest" if args.digest else ""
+    subject = f"github:{owner}/{repo}@{commit}:{mode}{pipeline}".lower()
+
+    manifest_key = None
+    fingerprint = generator_fingerprint(llm)
+    if fingerprint:
+        manifest_key = f"github:{owner}/{repo}:{mode}:{fingerprint}".lower()
+
+    return subject, manifest_key
+
+
+def _repo_full_name(bundle: SignalBundle) -> str:
+    return bundle.repo_data.get("full_name") or f"{bundle.owner}/{bundle.repo}"
+
+
+def _rename_repo(text: str, old_name: str, new_name: str) -> str:
+    # Only standalone "owner/repo" mentions: not inside a URL or path, not
+    # part of a longer name, and not followed by more path or ".git".
+    if old_name == new_name:
+        return text
+    pattern = rf"(?<![\w./-]){re.escape(old_name)}(?![\w/-]|\.\w)"
+    return re.sub(pattern, lambda _: new_name, text)
+
+
+def _tree_subject(args, source: SignalBundle) -> str:
+    # Explanations shared through a tree are stored under the name of the
+    # repository that was read first, which is what gets renamed on reuse.
+    mode = _run_mode_name(args)
+    return f"tree:{source.tree_sha}:{_repo_full_name(source)}:{mode}".lower()
+
+
+def _resolve_target_commit(
+    args, owner: str, repo: str
+) -> tuple[str | None, str | None]:
+    if args.fetch_backend == "graphql":
         try:
-            with console.status(f"Fetching {owner}/{repo}...", spinner="dots"):
-                repo_data = fetch_repo(owner, repo)
-                readme = fetch_readme(owner, repo)
-                read_result = read_repo_signal_files(owner, repo)
-        except Exception as e:
+            configure_client(use_graphql=True)
+        except RuntimeError as e:
             print(f"error: {e}")
             raise SystemExit(1)
 
-        prompt = build_repo_map_prompt(
-            repo_name=repo_data.get("full_name"),
-            description=repo_data.get("description"),
-            readme=readme,
-            tree_text=read_result.tree_text,
-            files_text=read_result.files_text,
-        )
+    # Everything below is pinned to one commit, so an unchanged repository
+    # costs this single lookup before the cached explanation is reused.
+    try:
+        commit = resolve_commit(owner, repo, args.ref)
+    except Exception:
+        commit = None
 
-        with console.status("Generating repo map...", spinner="dots"):
-            output = generate_with_exit(prompt, llm=llm)
+    if args.ref and commit is None:
+        print(f"error: could not resolve ref '{args.ref}' in {owner}/{repo}")
+        raise SystemExit(1)
 
-        output_path = _resolve_mode_output(args, "REPO_MAP.md")
-        print(f"Writing {output_path}...")
-        write_output(output, output_path)
+    return commit, commit or args.ref
 
-        word_count = len(output.split())
-        print(f"{output_path} generated successfully 🎉")
-        print(f"Words: {word_count}")
-        print(f"Location: {os.path.abspath(output_path)}")
-        print(f"Open {output_path} to navigate the codebase.")
-        return
+
+def _fetch_bundle_with_exit(
+    args,
+    owner: str,
+    repo: str,
+    commit: str | None,
+    ref: str | None,
+    parts: tuple[str, ...],
+    files_required: bool,
+) -> SignalBundle:
+    def warn(e: Exception) -> None:
+        print(f"warning: could not read repository files: {e}")
 
     try:
         with console.status(f"Fetching {owner}/{repo}...", spinner="dots"):
-            repo_data = fetch_repo(owner, repo)
-            readme = fetch_readme(owner, repo)
+            return fetch_signal_bundle(
+                owner,
+                repo,
+                commit=commit,
+                ref=ref,
+                parts=parts,
+                fetch_concurrency=args.fetch_concurrency,
+                backend=args.fetch_backend,
+                on_files_error=None if files_required else warn,
+            )
     except Exception as e:
         print(f"error: {e}")
         raise SystemExit(1)
 
-    if args.quick:
-        prompt = build_quick_prompt(
-            repo_name=repo_data.get("full_name"),
-            description=repo_data.get("description"),
-            readme=readme,
-        )
 
-        with console.status("Generating explanation...", spinner="dots"):
-            output = generate_with_exit(prompt, llm=llm)
+def _handle_github_mode(args, llm: str | None) -> None:
+    try:
+        owner, repo = resolve_repo_target(args.repository)
+    except ValueError as e:
+        print(f"error: {e}")
+        raise SystemExit(1)
 
-        print("Quick summary 🎉")
-        print(output.strip())
+    commit, ref = _resolve_target_commit(args, owner, repo)
+
+    if args.stack:
+        bundle = _fetch_bundle_with_exit(
+            args, owner, repo, commit, ref, _bundle_parts(args), files_required=True
+        )
+        _print_bundle_stack(bundle)
         return
 
-    if args.simple:
-        with console.status("Reading repository files...", spinner="dots"):
-            read_result = safe_read_repo_files(owner, repo)
+    subject, manifest_key = _run_keys(args, owner, repo, commit, llm)
+    output = None
+    if subject:
+        output = cached_explanation(subject, provider_override=llm)
+        if output is not None:
+            print(f"Reusing the explanation cached for commit {commit[:12]}")
 
-        prompt = build_simple_prompt(
-            repo_name=repo_data.get("full_name"),
-            description=repo_data.get("description"),
-            readme=readme,
-            tree_text=read_result.tree_text if read_result else None,
-        )
+    if output is None and args.digest:
+        try:
+            with console.status(f"Fetching {owner}/{repo}...", spinner="dots"):
+                repo_data = fetch_repo(owner, repo, ref=ref)
+        except Exception as e:
+            print(f"error: {e}")
+            raise SystemExit(1)
+
+        digest = _repo_digest(args, owner, repo, commit, ref, repo_data, llm)
+        prompt = _digest_mode_prompt(args, repo_data, digest)
 
         with console.status("Generating explanation...", spinner="dots"):
-            output = generate_with_exit(prompt, llm=llm)
+            output = generate_with_exit(prompt, llm=llm, subject=subject)
 
-        print("Simple summary 🎉")
-        print(output.strip())
-        return
+    if output is None and commit and "files" in _bundle_parts(args):
+        output = _fork_explanation(
+            args, llm, owner, repo, commit, subject, manifest_key
+        )
 
-    with console.status("Reading repository files...", spinner="dots"):
-        read_result = safe_read_repo_files(owner, repo)
+    if output is None:
+        bundle = _fetch_bundle_with_exit(
+            args,
+            owner,
+            repo,
+            commit,
+            ref,
+            _bundle_parts(args),
+            files_required=args.map,
+        )
+        output = _explain_bundle(args, llm, bundle, subject, manifest_key)
 
-    prompt = build_prompt(
-        repo_name=repo_data.get("full_name"),
-        description=repo_data.get("description"),
-        readme=readme,
-        detailed=args.detailed,
-        tree_text=read_result.tree_text if read_result else None,
-        files_text=read_result.files_text if read_result else None,
+    _write_mode_output(args, output)
+
+
+def _handle_fetch_command(args) -> None:
+    try:
+        owner, repo = resolve_repo_target(args.repository)
+    except ValueError as e:
+        print(f"error: {e}")
+        raise SystemExit(1)
+
+    commit, ref = _resolve_target_commit(args, owner, repo)
+    bundle = _fetch_bundle_with_exit(
+        args, owner, repo, commit, ref, BUNDLE_PARTS, files_required=True
     )
 
-    with console.status("Generating explanation...", spinner="dots"):
-        output = generate_with_exit(prompt, llm=llm)
+    output_path = _resolve_mode_output(args, f"{repo}{BUNDLE_SUFFIX}")
+    try:
+        path = write_bundle(bundle, output_path)
+    except OSError as e:
+        print(f"error: could not write bundle: {e}")
+        raise SystemExit(1)
 
-    print(f"Writing {args.output}...")
-    write_output(output, args.output)
+    pinned = f" at {commit[:12]}" if commit else ""
+    print(f"Fetched {owner}/{repo}{pinned} into {path}")
+    print(f"Size: {path.stat().st_size} bytes")
+    print(f"Explain it offline with: explainthisrepo explain {path}")
 
-    word_count = len(output.split())
-    print(f"{args.output} generated successfully 🎉")
-    print(f"Words: {word_count}")
-    print(f"Location: {os.path.abspath(args.output)}")
-    print(f"Open {args.output} to read it.")
+
+def _handle_bundle_mode(args, llm: str | None) -> None:
+    # Everything comes from the bundle; no GitHub call is made.
+    try:
+        bundle = read_bundle(args.repository)
+    except RuntimeError as e:
+        print(f"error: {e}")
+        raise SystemExit(1)
+
+    if args.digest:
+        print("error: --digest is not supported for bundles")
+        raise SystemExit(1)
+
+    missing = bundle.missing_parts(_bundle_parts(args))
+    if missing:
+        print(f"error: this bundle does not contain: {', '.join(missing)}")
+        print("Fetch it again with: explainthisrepo fetch owner/repo -o bundle.etr")
+        raise SystemExit(1)
+
+    if args.stack:
+        _print_bundle_stack(bundle)
+        return
+
+    subject, manifest_key = _run_keys(
+        args, bundle.owner, bundle.repo, bundle.commit, llm
+    )
+    output = None
+    if subject:
+        output = cached_explanation(subject, provider_override=llm)
+        if output is not None:
+            print(f"Reusing the explanation cached for commit {bundle.commit[:12]}")
+
+    if output is None and bundle.commit:
+        output = _explain_from_identical_tree(args, llm, bundle, subject, manifest_key)
+
+    if output is None:
+        output = _explain_bundle(args, llm, bundle, subject, manifest_key)
+
+    _write_mode_output(args, output)
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got '{value}'")
+    return number
 
 
 def main():
+    # `cache` takes its own subcommands, so it is dispatched before the main
+    # parser; a local directory called "cache" still works as a target.
+    if len(sys.argv) > 1 and sys.argv[1] == "cache":
+        if len(sys.argv) == 2 or sys.argv[2] in CACHE_COMMANDS + ("-h", "--help"):
+            raise SystemExit(run_cache_command(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
         prog="explainthisrepo",
         description="The fastest way to understand any unfamiliar codebase using real project signals. Not blind AI guessing. Signals first. LLM second.",
@@ -936,6 +1542,17 @@ def main():
         "  explainthisrepo --doctor --llm <model name>\n"
         "  explainthisrepo --version\n\n"
 
+        "Offline bundles:\n\n"
+        "  explainthisrepo fetch owner/repo -o repo.etr\n"
+        "  explainthisrepo explain repo.etr --detailed\n\n"
+
+        "Caches:\n\n"
+        "  explainthisrepo cache stats\n"
+        "  explainthisrepo cache prune --max-age-days 30\n"
+        "  explainthisrepo cache clear [name ...]\n"
+        "  explainthisrepo cache export caches.tar.gz\n"
+        "  explainthisrepo cache import caches.tar.gz\n\n"
+
         "GitHub token:\n\n"
         "  Access private repos and higher rate limits\n"
         "  Run:\n"
@@ -980,10 +1597,84 @@ def main():
         ),
     )
 
+    parser.add_argument(
+        "--fetch-concurrency",
+        metavar="N",
+        type=_positive_int,
+        default=DEFAULT_FETCH_CONCURRENCY,
+        help=(
+            "Number of GitHub files to download in parallel "
+            f"(default: {DEFAULT_FETCH_CONCURRENCY})"
+        ),
+    )
+
+    parser.add_argument(
+        "--fetch-backend",
+        choices=FETCH_BACKENDS,
+        default="auto",
+        help=(
+            "How GitHub files are downloaded (default: auto).\n"
+            "contents: one API call per file\n"
+            "archive: one tarball download, only picked files are extracted;\n"
+            "  falls back to contents past 32 MB or 60 seconds\n"
+            "graphql: batch metadata, README, languages and files (needs a token)\n"
+            "auto: archive for small repositories when many files are needed,\n"
+            "  contents otherwise\n"
+        ),
+    )
+
+    parser.add_argument(
+        "--ref",
+        default=None,
+        help=(
+            "Branch, tag or commit of a GitHub repository to explain "
+            "(default: the default branch)"
+        ),
+    )
+
+    parser.add_argument(
+        "--digest",
+        action="store_true",
+        help=(
+            "Condense a GitHub repository into a digest once per commit and\n"
+            "answer every mode from it with a smaller LLM call"
+        ),
+    )
+
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="Walk a local directory from scratch instead of reusing the scan index",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the on-disk caches for this run",
+    )
+
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help=(
+            "Ask the LLM again even if a cached explanation exists, "
+            "and cache the new one"
+        ),
+    )
+
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print network statistics for this run when it finishes",
+    )
+
     parser.add_argument(
         "command",
         nargs="?",
-        help="Optional command (e.g. explainthisrepo init)",
+        help=(
+            "Optional command: init, cache, fetch owner/repo (write a signal\n"
+            "bundle) or explain bundle.etr (explain a bundle offline)"
+        ),
     )
 
     parser.add_argument(
@@ -1054,16 +1745,34 @@ def main():
             "repository argument required (or use 'explainthisrepo init') to set up API key or GitHub token"
         )
 
-    mode = _classify_target(args.repository)
+    if args.no_cache:
+        disable_caches()
+    if args.refresh:
+        refresh_responses()
 
-    if mode == "file":
-        _handle_file_mode(args, llm)
-    elif mode == "directory":
-        _handle_directory_mode(args, llm)
-    elif mode == "github_directory":
-        _handle_github_directory_mode(args, llm)
+    if args.command == "fetch":
+        mode = "fetch"
+    elif args.command == "explain":
+        mode = "bundle"
     else:
-        _handle_github_mode(args, llm)
+        mode = _classify_target(args.repository)
+
+    try:
+        if mode == "fetch":
+            _handle_fetch_command(args)
+        elif mode == "bundle":
+            _handle_bundle_mode(args, llm)
+        elif mode == "file":
+            _handle_file_mode(args, llm)
+        elif mode == "directory":
+            _handle_directory_mode(args, llm)
+        elif mode == "github_directory":
+            _handle_github_directory_mode(args, llm)
+        else:
+            _handle_github_mode(args, llm)
+    finally:
+        if args.stats:
+            print_run_stats(f"{mode}, {_run_mode_name(args)}")
 
 
 def _run():
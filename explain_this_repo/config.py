@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional
 
 CONFIG_DIR_NAME = "ExplainThisRepo"
 CONFIG_FILE_NAME = "config.toml"
+CACHE_DIR_NAME = "cache"
 
 
 def get_config_path() -> Path:
@@ -28,6 +29,10 @@ def get_config_path() -> Path:
     return base / CONFIG_FILE_NAME
 
 
+def get_cache_dir() -> Path:
+    return get_config_path().parent / CACHE_DIR_NAME
+
+
 def ensure_config_dir() -> Path:
     path = get_config_path()
     path.parent.mkdir(parents=True, exist_ok=True)
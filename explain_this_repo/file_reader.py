@@ -6,6 +6,18 @@ from pathlib import Path
 _MAX_DEFAULT_BYTES = 32_000
 _SAMPLE_SIZE = 4_096
 
+# Bytes that count against a sample: C0 controls other than tab, newline,
+# carriage return, form feed and backspace, plus DEL. Deleting every other
+# byte leaves exactly those to count.
+_NOT_CONTROL_BYTES = bytes(
+    b for b in range(256) if not ((b < 32 and b not in (8, 9, 10, 12, 13)) or b == 127)
+)
+
+# Text that fits in Latin-1 is counted as bytes: deleting the printable
+# ones leaves the hidden ones.
+_PRINTABLE_LATIN1 = bytes(b for b in range(256) if chr(b).isprintable())
+_SPLIT_FLOOR = 256
+
 
 @dataclass(frozen=True, slots=True)
 class FileReadResult:
@@ -17,15 +29,28 @@ class FileReadResult:
     is_text: bool
 
 
+def _count_hidden(text: str) -> int:
+    # Characters str.isprintable() rejects. isprintable() runs in C, so
+    # halves that pass are skipped whole; only halves holding something
+    # hidden are split further.
+    if text.isprintable():
+        return 0
+    try:
+        return len(text.encode("latin-1").translate(None, _PRINTABLE_LATIN1))
+    except UnicodeEncodeError:
+        pass
+    if len(text) <= _SPLIT_FLOOR:
+        return sum(1 for ch in text if not ch.isprintable())
+    middle = len(text) // 2
+    return _count_hidden(text[:middle]) + _count_hidden(text[middle:])
+
+
 def _text_ratio(value: str) -> float:
     if not value:
         return 1.0
 
-    visible = 0
-    for ch in value:
-        if ch.isprintable() or ch in "\n\r\t":
-            visible += 1
-    return visible / len(value)
+    rest = value.replace("\n", "").replace("\r", "").replace("\t", "")
+    return (len(value) - _count_hidden(rest)) / len(value)
 
 
 def _is_probably_binary(sample: bytes) -> bool:
@@ -60,20 +85,24 @@ def _is_probably_binary(sample: bytes) -> bool:
                 return False
         return True
 
-    control = 0
-    for byte in sample:
-        if byte in (9, 10, 13, 12, 8):
-            continue
-        if byte < 32 or byte == 127:
-            control += 1
-
+    control = len(sample.translate(None, _NOT_CONTROL_BYTES))
     return control / len(sample) > 0.3
 
 
 def _decode_text(raw: bytes) -> str:
+    # utf-8-sig is utf-8 with a leading BOM dropped, so its answer follows
+    # from the utf-8 attempt without decoding the buffer a second time.
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    else:
+        if _text_ratio(text) >= 0.6:
+            return text
+        if text.startswith("\ufeff") and _text_ratio(text[1:]) >= 0.6:
+            return text[1:]
+
     encodings = (
-        "utf-8",
-        "utf-8-sig",
         "utf-16",
         "utf-16-le",
         "utf-16-be",
@@ -1,18 +1,72 @@
+from explain_this_repo.llm_cache import (
+    get_response,
+    provider_fingerprint,
+    put_response,
+    response_key,
+    subject_key,
+)
 from explain_this_repo.providers.registry import get_active_provider
 
 
+def cached_explanation(
+    subject: str,
+    provider_override: str | None = None,
+) -> str | None:
+    try:
+        provider = get_active_provider(override=provider_override)
+    except Exception:
+        return None
+    return get_response(subject_key(subject, provider))
+
+
+def generator_fingerprint(provider_override: str | None = None) -> str | None:
+    try:
+        provider = get_active_provider(override=provider_override)
+    except Exception:
+        return None
+    return provider_fingerprint(provider)
+
+
+def remember_explanation(
+    subject: str,
+    output: str,
+    provider_override: str | None = None,
+) -> None:
+    try:
+        provider = get_active_provider(override=provider_override)
+    except Exception:
+        return
+    put_response(
+        subject_key(subject, provider),
+        output,
+        {"provider": provider.name, "model": getattr(provider, "model", None)},
+    )
+
+
 def generate_explanation(
     prompt: str,
     provider_override: str | None = None,
+    subject: str | None = None,
 ) -> str:
     provider = get_active_provider(override=provider_override)
+    meta = {"provider": provider.name, "model": getattr(provider, "model", None)}
 
-    try:
-        output = provider.generate(prompt)
-    except Exception as e:
-        raise RuntimeError(f"{provider.name} generation failed: {e}") from e
+    key = response_key(prompt, provider)
+    output = get_response(key)
+
+    if output is None:
+        try:
+            output = provider.generate(prompt)
+        except Exception as e:
+            raise RuntimeError(f"{provider.name} generation failed: {e}") from e
+
+        if not output or not output.strip():
+            raise RuntimeError(f"{provider.name} returned no output")
+
+        output = output.strip()
+        put_response(key, output, meta)
 
-    if not output or not output.strip():
-        raise RuntimeError(f"{provider.name} returned no output")
+    if subject:
+        put_response(subject_key(subject, provider), output, meta)
 
-    return output.strip()
+    return output
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import os
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+_LS_FILES_TIMEOUT = 30
+
+# `git ls-files -t` tags cached entries H, or M while unmerged, and
+# untracked ones ?; S marks skip-worktree entries, which are not checked out.
+_LISTED_TAGS = ("H ", "M ", "? ")
+
+_INDEX_SIGNATURE = b"DIRC"
+_ENTRY_HEADER = 62
+_EXTENDED_FLAG = 0x4000
+_SKIP_WORKTREE_FLAG = 0x4000
+_NAME_MASK = 0x0FFF
+_MODE_TYPE_MASK = 0o170000
+_TREE_MODE = 0o040000
+
+
+def git_ls_files(root: Path) -> Optional[list[str]]:
+    # Paths under root, relative to it: everything in the index plus
+    # untracked files that no ignore rule excludes, so work in progress that
+    # has not been added yet is still listed.
+    git = shutil.which("git")
+    if git is None:
+        return None
+
+    try:
+        completed = subprocess.run(
+            [
+                git,
+                "ls-files",
+                "-z",
+                "-t",
+                "--cached",
+                "--others",
+                "--exclude-standard",
+            ],
+            cwd=str(root),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=_LS_FILES_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    if completed.returncode != 0:
+        return None
+
+    records = os.fsdecode(completed.stdout).split("\0")
+    # Unmerged paths are listed once per stage.
+    listed = dict.fromkeys(
+        record[2:] for record in records if record[:2] in _LISTED_TAGS
+    )
+    return list(listed)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def read_index_paths(root: Path) -> Optional[list[str]]:
+    # Without a git executable the index file itself still lists every
+    # tracked path (formats 2 to 4); untracked files are not in it.
+    try:
+        data = (root / ".git" / "index").read_bytes()
+    except OSError:
+        return None
+
+    if len(data) < 12 or data[:4] != _INDEX_SIGNATURE:
+        return None
+
+    version, count = struct.unpack(">II", data[4:12])
+    if version not in (2, 3, 4):
+        return None
+
+    paths: dict[str, None] = {}
+    offset = 12
+    previous = b""
+
+    try:
+        for _ in range(count):
+            start = offset
+            mode = struct.unpack(">I", data[offset + 24 : offset + 28])[0]
+            flags = struct.unpack(">H", data[offset + 60 : offset + 62])[0]
+            offset += _ENTRY_HEADER
+
+            extended = 0
+            if version >= 3 and flags & _EXTENDED_FLAG:
+                extended = struct.unpack(">H", data[offset : offset + 2])[0]
+                offset += 2
+
+            if version == 4:
+                strip, offset = _read_varint(data, offset)
+                end = data.index(b"\0", offset)
+                name = previous[: len(previous) - strip] + data[offset:end]
+                offset = end + 1
+            else:
+                length = flags & _NAME_MASK
+                end = data.index(b"\0", offset)
+                if length < _NAME_MASK and end - offset != length:
+                    return None
+                name = data[offset:end]
+                # Entries are NUL-padded to a multiple of eight bytes.
+                offset = start + ((offset - start + len(name) + 8) & ~7)
+
+            previous = name
+            if extended & _SKIP_WORKTREE_FLAG:
+                continue
+            # Sparse indexes keep whole collapsed directories as one entry.
+            if mode & _MODE_TYPE_MASK == _TREE_MODE:
+                continue
+            paths[os.fsdecode(name)] = None
+    except (IndexError, ValueError, struct.error):
+        return None
+
+    return list(paths)
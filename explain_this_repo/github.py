@@ -3,18 +3,61 @@ from __future__ import annotations
 import base64
 import binascii
 import os
+import re
+import tarfile
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from typing import Optional
 from urllib.parse import quote
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 
+from explain_this_repo.blob_cache import get_blob, get_blob_size, put_blob
+from explain_this_repo.cache import CacheStore, caches_enabled
 from explain_this_repo.config import load_config
 from explain_this_repo.file_reader import FileReadResult, build_file_read_result
+from explain_this_repo.http_cache import HttpCache, auth_identity, cache_key
+from explain_this_repo.rate_limit import (
+    RateLimitBudget,
+    RateLimitScheduler,
+    rate_limit_kind,
+)
 
 GITHUB_API_BASE = "https://api.github.com"
+GITHUB_RAW_BASE = "https://raw.githubusercontent.com"
 _MAX_FILE_BYTES = 32_000
 
+# A default run talks to api.github.com and raw.githubusercontent.com only,
+# so a handful of host pools with a few keep-alive sockets each is plenty.
+_POOL_CONNECTIONS = 4
+_POOL_MAXSIZE = 16
+
+# Success and not-found are stable for the length of a run; anything else
+# (rate limits, server errors) must stay retryable.
+_MEMO_STATUSES = (200, 404)
+
+NEGATIVE_CACHE_NAME = "negative"
+NEGATIVE_CACHE_MAX_BYTES = 4 * 1024 * 1024
+_README_MISS_TTL = 24 * 60 * 60
+_README_PROBE_WORKERS = 6
+
+# Anything addressed by a full object id can never change, so it is served
+# from the cache without asking GitHub again.
+_OBJECT_ID_RE = re.compile(r"^[0-9a-f]{40}$")
+
+# The read timeout applies per socket read, so a tarball download also gets
+# an overall byte and time budget.
+_ARCHIVE_MAX_DOWNLOAD_BYTES = 32 * 1024 * 1024
+_ARCHIVE_MAX_SECONDS = 60.0
+
+
+class ArchiveLimitError(RuntimeError):
+    pass
+
 
 def _get_token(token: Optional[str] = None) -> Optional[str]:
     if token and token.strip():
@@ -38,20 +81,388 @@ def _get_token(token: Optional[str] = None) -> Optional[str]:
     return None
 
 
-def _make_session(token: Optional[str] = None) -> requests.Session:
-    session = requests.Session()
+@dataclass(frozen=True)
+class ClientStats:
+    requests: int
+    connections: int
+    deduplicated: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_revalidated: int = 0
 
-    headers = {
-        "User-Agent": "explainthisrepo/1.0",
-        "Accept": "application/vnd.github+json",
-    }
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.connections)
+
+
+def _rate_limit_resource(url: str) -> Optional[str]:
+    if not url.startswith(GITHUB_API_BASE):
+        return None
+    if url.rstrip("/").endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+@dataclass(frozen=True)
+class GraphQLRateLimit:
+    cost: int
+    remaining: int
+    limit: int
+    reset_at: str
+
+
+class GitHubClient:
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        *,
+        pool_connections: int = _POOL_CONNECTIONS,
+        pool_maxsize: int = _POOL_MAXSIZE,
+    ) -> None:
+        self.token = token
+        self.use_http_cache = True
+        self.use_graphql = False
+        self.graphql_rate_limit: Optional[GraphQLRateLimit] = None
+        self._graphql_overviews: dict[tuple[str, str], dict] = {}
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._deduplicated = 0
+        self._memo: dict[tuple, requests.Response] = {}
+        self._inflight: dict[tuple, Future] = {}
+        self._http_cache: Optional[HttpCache] = None
+        self._negative_cache: Optional[CacheStore] = None
+        self.scheduler = RateLimitScheduler()
+
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0,
+            pool_block=False,
+        )
+
+        session = requests.Session()
+        session.mount("https://", self._adapter)
+        session.mount("http://", self._adapter)
+
+        headers = {
+            "User-Agent": "explainthisrepo/1.0",
+            "Accept": "application/vnd.github+json",
+        }
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        session.headers.update(headers)
+        self.session = session
+
+    def get(
+        self,
+        url: str,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        timeout: int = 10,
+        stream: bool = False,
+        immutable: bool = False,
+    ) -> requests.Response:
+        if stream:
+            return self._fetch(url, headers=headers, timeout=timeout, stream=True)
+
+        # Identical GETs within a run share one response, and concurrent
+        # callers asking for the same URL wait on the request already in
+        # flight instead of issuing their own.
+        key = ("GET", url, tuple(sorted((headers or {}).items())))
+        with self._lock:
+            memoized = self._memo.get(key)
+            if memoized is not None:
+                self._deduplicated += 1
+                return memoized
+
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self._deduplicated += 1
+            else:
+                self._inflight[key] = Future()
+
+        if pending is not None:
+            return pending.result()
+
+        try:
+            response = self._fetch(
+                url, headers=headers, timeout=timeout, immutable=immutable
+            )
+            response.content
+        except BaseException as e:
+            with self._lock:
+                future = self._inflight.pop(key)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            future = self._inflight.pop(key)
+            if response.status_code in _MEMO_STATUSES:
+                self._memo[key] = response
+        future.set_result(response)
+        return response
+
+    def _fetch(
+        self,
+        url: str,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        timeout: int = 10,
+        stream: bool = False,
+        immutable: bool = False,
+    ) -> requests.Response:
+        cache = None if stream else self.http_cache()
+        key = ""
+        entry = None
+
+        if cache is not None:
+            accept = (headers or {}).get("Accept") or self.session.headers["Accept"]
+            key = cache_key(url, accept, auth_identity(self.token))
+            entry = cache.lookup(key)
+            if entry is not None and entry.meta.get("immutable"):
+                cache.store.count("hits")
+                return cache.replay(entry, url)
+            if entry is not None:
+                headers = {**(headers or {}), **cache.conditional_headers(entry)}
+
+        self.scheduler.acquire(_rate_limit_resource(url))
+        with self._lock:
+            self._requests += 1
+        response = self.session.get(
+            url, headers=headers, timeout=timeout, stream=stream
+        )
+        self.scheduler.observe(response)
+
+        if cache is None:
+            return response
+
+        if entry is not None and response.status_code == 304:
+            cache.store.count("hits")
+            cache.store.count("revalidated")
+            return cache.replay(entry, url, revalidation=response)
+
+        if response.status_code == 200:
+            cache.store.count("misses")
+            cache.save(key, response, immutable=immutable)
+
+        return response
+
+    def http_cache(self) -> Optional[HttpCache]:
+        if not self.use_http_cache or not caches_enabled():
+            return None
+
+        with self._lock:
+            if self._http_cache is None:
+                try:
+                    self._http_cache = HttpCache()
+                except Exception:
+                    self.use_http_cache = False
+                    return None
+            return self._http_cache
+
+    def negative_cache(self) -> Optional[CacheStore]:
+        if not self.use_http_cache or not caches_enabled():
+            return None
+
+        with self._lock:
+            if self._negative_cache is None:
+                try:
+                    self._negative_cache = CacheStore(
+                        NEGATIVE_CACHE_NAME, NEGATIVE_CACHE_MAX_BYTES
+                    )
+                except Exception:
+                    return None
+            return self._negative_cache
+
+    def post(
+        self,
+        url: str,
+        *,
+        json: dict,
+        timeout: int = 20,
+    ) -> requests.Response:
+        self.scheduler.acquire(_rate_limit_resource(url))
+        with self._lock:
+            self._requests += 1
+        response = self.session.post(url, json=json, timeout=timeout)
+        self.scheduler.observe(response)
+        return response
+
+    def graphql_overview(
+        self, owner: str, repo: str, ref: Optional[str] = None
+    ) -> dict:
+        # Metadata and languages do not depend on the ref, so any overview
+        # already fetched serves them; the README has to come from the ref
+        # the run is pinned to.
+        key = (owner.lower(), repo.lower())
+        with self._lock:
+            cached = self._graphql_overviews.get(key)
+        if cached is not None and (ref is None or cached["ref"] == ref):
+            return cached
+
+        ref = ref or "HEAD"
+        params = "".join(
+            f", $readme{i}: String!" for i in range(len(_README_CANDIDATES))
+        )
+        readme_fields = "\n".join(
+            f"    readme{i}: object(expression: $readme{i}) "
+            "{ ... on Blob { text isBinary } }"
+            for i in range(len(_README_CANDIDATES))
+        )
+        variables = {"owner": owner, "name": repo}
+        for i, name in enumerate(_README_CANDIDATES):
+            variables[f"readme{i}"] = f"{ref}:{name}"
+
+        data = _request_graphql(
+            self,
+            _GRAPHQL_OVERVIEW_QUERY % (params, readme_fields),
+            variables,
+            owner=owner,
+            repo=repo,
+        )
+
+        node = data.get("repository")
+        if not isinstance(node, dict):
+            raise RuntimeError(
+                f"GitHub GraphQL API returned no repository for {owner}/{repo}."
+            )
+
+        parent = node.get("parent")
+        default_branch = node.get("defaultBranchRef") or {}
+        repo_meta = {
+            "name": node.get("name"),
+            "full_name": node.get("nameWithOwner"),
+            "owner": {"login": (node.get("owner") or {}).get("login")},
+            "description": node.get("description"),
+            "default_branch": default_branch.get("name") or "main",
+            "fork": bool(node.get("isFork")),
+            "private": bool(node.get("isPrivate")),
+            "parent": (
+                {"full_name": parent.get("nameWithOwner")}
+                if isinstance(parent, dict)
+                else None
+            ),
+        }
+
+        languages: dict[str, int] = {}
+        for edge in (node.get("languages") or {}).get("edges") or []:
+            if not isinstance(edge, dict):
+                continue
+            name = (edge.get("node") or {}).get("name")
+            if name:
+                languages[name] = int(edge.get("size") or 0)
+
+        readme = None
+        for i in range(len(_README_CANDIDATES)):
+            readme = _blob_text(node.get(f"readme{i}"))
+            if readme:
+                break
+
+        overview = {
+            "ref": ref,
+            "repo": repo_meta,
+            "languages": languages,
+            "readme": readme,
+        }
+        with self._lock:
+            self._graphql_overviews[key] = overview
+        return overview
+
+    def rate_limit_budget(self, resource: str = "core") -> Optional[RateLimitBudget]:
+        return self.scheduler.budget(resource)
+
+    def stats(self) -> ClientStats:
+        connections = 0
+        try:
+            pools = self._adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                connections += int(getattr(pool, "num_connections", 0) or 0)
+        except Exception:
+            connections = 0
+
+        cache_hits = cache_misses = cache_revalidated = 0
+        if self._http_cache is not None:
+            counters = self._http_cache.store.counters
+            cache_hits = counters.hits
+            cache_misses = counters.misses
+            cache_revalidated = counters.extra.get("revalidated", 0)
+
+        with self._lock:
+            return ClientStats(
+                requests=self._requests,
+                connections=connections,
+                deduplicated=self._deduplicated,
+                cache_hits=cache_hits,
+                cache_misses=cache_misses,
+                cache_revalidated=cache_revalidated,
+            )
+
+    def close(self) -> None:
+        self.session.close()
 
-    resolved_token = _get_token(token)
-    if resolved_token:
-        headers["Authorization"] = f"Bearer {resolved_token}"
 
-    session.headers.update(headers)
-    return session
+_clients: dict[Optional[str], GitHubClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(token: Optional[str] = None) -> GitHubClient:
+    key = token.strip() if token and token.strip() else None
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = GitHubClient(_get_token(key))
+            _clients[key] = client
+        return client
+
+
+def configure_client(
+    token: Optional[str] = None,
+    *,
+    use_graphql: Optional[bool] = None,
+    use_http_cache: Optional[bool] = None,
+) -> GitHubClient:
+    client = get_client(token)
+    if use_http_cache is not None:
+        client.use_http_cache = use_http_cache
+    if use_graphql is not None:
+        if use_graphql and not client.token:
+            raise RuntimeError(
+                "The GraphQL backend requires a GitHub token.\n"
+                "Fix:\n"
+                "- Set GITHUB_TOKEN in config or environment\n"
+                "- Or run `explainthisrepo init`\n"
+            )
+        client.use_graphql = use_graphql
+    return client
+
+
+def rate_limit_budget(
+    token: Optional[str] = None,
+    resource: str = "core",
+) -> Optional[RateLimitBudget]:
+    return get_client(token).rate_limit_budget(resource)
+
+
+def client_stats() -> ClientStats:
+    with _clients_lock:
+        clients = list(_clients.values())
+
+    totals = ClientStats(requests=0, connections=0)
+    for client in clients:
+        stats = client.stats()
+        totals = ClientStats(
+            requests=totals.requests + stats.requests,
+            connections=totals.connections + stats.connections,
+            deduplicated=totals.deduplicated + stats.deduplicated,
+            cache_hits=totals.cache_hits + stats.cache_hits,
+            cache_misses=totals.cache_misses + stats.cache_misses,
+            cache_revalidated=totals.cache_revalidated + stats.cache_revalidated,
+        )
+
+    return totals
 
 
 def _rate_limit_message(response: requests.Response) -> str:
@@ -82,17 +493,18 @@ def _rate_limit_message(response: requests.Response) -> str:
 
 
 def _request_json(
-    session: requests.Session,
+    client: GitHubClient,
     url: str,
     *,
     timeout: int = 10,
     retries: int = 4,
+    immutable: bool = False,
 ) -> dict:
     backoff = 1.5
 
     for attempt in range(retries + 1):
         try:
-            response = session.get(url, timeout=timeout)
+            response = client.get(url, timeout=timeout, immutable=immutable)
         except requests.RequestException as e:
             if attempt == retries:
                 raise RuntimeError(f"Network error while calling GitHub: {e}") from e
@@ -112,18 +524,15 @@ def _request_json(
             )
 
         if response.status_code in (403, 429):
-            text_lower = (response.text or "").lower()
-
-            if response.headers.get("X-RateLimit-Remaining") == "0":
-                raise RuntimeError(_rate_limit_message(response))
-
-            if "secondary rate limit" in text_lower or "rate limit" in text_lower:
-                if attempt == retries:
+            if rate_limit_kind(response) is not None:
+                delay = client.scheduler.retry_delay(response, attempt)
+                if delay is None or attempt == retries:
                     raise RuntimeError(_rate_limit_message(response))
-                time.sleep(backoff)
-                backoff *= 2
+                time.sleep(delay)
                 continue
 
+            text_lower = (response.text or "").lower()
+
             if "resource not accessible by integration" in text_lower or "private" in text_lower:
                 raise RuntimeError("GitHub API access forbidden (403).")
 
@@ -148,19 +557,95 @@ def _request_json(
     raise RuntimeError("GitHub request failed unexpectedly.")
 
 
+def _range_headers(accept: str, max_bytes: Optional[int]) -> dict[str, str]:
+    headers = {"Accept": accept}
+    if max_bytes is not None:
+        headers["Range"] = f"bytes=0-{max_bytes - 1}"
+    return headers
+
+
+def _read_prefix(
+    response: requests.Response,
+    max_bytes: int,
+) -> tuple[bytes, Optional[int]]:
+    # Read one byte past the limit to learn whether the body was complete,
+    # then drop the connection rather than draining a large file.
+    try:
+        data = response.raw.read(max_bytes + 1, decode_content=True) or b""
+    finally:
+        response.close()
+
+    total: Optional[int] = None
+    content_range = response.headers.get("Content-Range") or ""
+    if response.status_code == 206 and "/" in content_range:
+        try:
+            total = int(content_range.rsplit("/", 1)[1])
+        except ValueError:
+            total = None
+    elif len(data) <= max_bytes:
+        total = len(data)
+    elif not response.headers.get("Content-Encoding"):
+        try:
+            total = int(response.headers.get("Content-Length") or "")
+        except ValueError:
+            total = None
+
+    return data[:max_bytes], total
+
+
+def _release_error_body(response: requests.Response) -> None:
+    # A streamed request that failed: the body is short and the status
+    # checks may read it, so load it and close the stream either way.
+    try:
+        response.content
+    finally:
+        response.close()
+
+
 def _request_text(
-    session: requests.Session,
+    client: GitHubClient,
     url: str,
     *,
     accept: str,
     timeout: int = 10,
     retries: int = 4,
+    max_bytes: Optional[int] = None,
+    immutable: bool = False,
 ) -> Optional[str]:
+    content = _request_content(
+        client,
+        url,
+        accept=accept,
+        timeout=timeout,
+        retries=retries,
+        max_bytes=max_bytes,
+        immutable=immutable,
+    )
+    return content[1] if content is not None else None
+
+
+def _request_content(
+    client: GitHubClient,
+    url: str,
+    *,
+    accept: str,
+    timeout: int = 10,
+    retries: int = 4,
+    max_bytes: Optional[int] = None,
+    immutable: bool = False,
+) -> Optional[tuple[bytes, str]]:
+    # The body as received, next to its decoded text.
     backoff = 1.5
 
     for attempt in range(retries + 1):
         try:
-            response = session.get(url, headers={"Accept": accept}, timeout=timeout)
+            response = client.get(
+                url,
+                headers=_range_headers(accept, max_bytes),
+                timeout=timeout,
+                stream=max_bytes is not None,
+                immutable=immutable,
+            )
         except requests.RequestException:
             if attempt == retries:
                 return None
@@ -168,25 +653,43 @@ def _request_text(
             backoff *= 2
             continue
 
+        if max_bytes is not None and response.status_code in (200, 206):
+            try:
+                data, _ = _read_prefix(response, max_bytes)
+            except (requests.RequestException, Urllib3HTTPError, OSError):
+                if attempt == retries:
+                    return None
+                time.sleep(backoff)
+                backoff *= 2
+                continue
+            return data, data.decode(response.encoding or "utf-8", errors="replace")
+
+        if max_bytes is not None:
+            try:
+                _release_error_body(response)
+            except (requests.RequestException, Urllib3HTTPError, OSError):
+                if attempt == retries:
+                    return None
+                time.sleep(backoff)
+                backoff *= 2
+                continue
+
         if response.status_code == 200:
-            return response.text
+            return response.content, response.text
 
         if response.status_code == 404:
             return None
 
         if response.status_code in (403, 429):
-            text_lower = (response.text or "").lower()
-
-            if response.headers.get("X-RateLimit-Remaining") == "0":
-                return None
-
-            if "secondary rate limit" in text_lower or "rate limit" in text_lower:
-                if attempt == retries:
+            if rate_limit_kind(response) is not None:
+                delay = client.scheduler.retry_delay(response, attempt)
+                if delay is None or attempt == retries:
                     return None
-                time.sleep(backoff)
-                backoff *= 2
+                time.sleep(delay)
                 continue
 
+            text_lower = (response.text or "").lower()
+
             if "resource not accessible by integration" in text_lower or "private" in text_lower:
                 return None
 
@@ -248,7 +751,7 @@ def _decode_base64_content(content: str) -> bytes:
 
 
 def _request_contents_json(
-    session: requests.Session,
+    client: GitHubClient,
     url: str,
     *,
     owner: str,
@@ -257,11 +760,35 @@ def _request_contents_json(
     timeout: int = 10,
     retries: int = 4,
 ) -> object:
+    response = _request_contents(
+        client,
+        url,
+        owner=owner,
+        repo=repo,
+        path=path,
+        timeout=timeout,
+        retries=retries,
+    )
+    return response.json()
+
+
+def _request_contents(
+    client: GitHubClient,
+    url: str,
+    *,
+    owner: str,
+    repo: str,
+    path: str,
+    headers: Optional[dict[str, str]] = None,
+    stream: bool = False,
+    timeout: int = 10,
+    retries: int = 4,
+) -> requests.Response:
     backoff = 1.5
 
     for attempt in range(retries + 1):
         try:
-            response = session.get(url, timeout=timeout)
+            response = client.get(url, headers=headers, timeout=timeout, stream=stream)
         except requests.RequestException as e:
             if attempt == retries:
                 raise RuntimeError(f"Network error while calling GitHub: {e}") from e
@@ -269,25 +796,34 @@ def _request_contents_json(
             backoff *= 2
             continue
 
-        if response.status_code == 200:
-            return response.json()
+        if response.status_code == 200 or (stream and response.status_code == 206):
+            return response
+
+        if stream:
+            try:
+                _release_error_body(response)
+            except (requests.RequestException, Urllib3HTTPError, OSError) as e:
+                if attempt == retries:
+                    raise RuntimeError(
+                        f"Network error while calling GitHub: {e}"
+                    ) from e
+                time.sleep(backoff)
+                backoff *= 2
+                continue
 
         if response.status_code == 404:
             raise RuntimeError(f"GitHub 404: {owner}/{repo}/{path} not found.")
 
         if response.status_code in (403, 429):
-            text_lower = (response.text or "").lower()
-
-            if response.headers.get("X-RateLimit-Remaining") == "0":
-                raise RuntimeError(_rate_limit_message(response))
-
-            if "secondary rate limit" in text_lower or "rate limit" in text_lower:
-                if attempt == retries:
+            if rate_limit_kind(response) is not None:
+                delay = client.scheduler.retry_delay(response, attempt)
+                if delay is None or attempt == retries:
                     raise RuntimeError(_rate_limit_message(response))
-                time.sleep(backoff)
-                backoff *= 2
+                time.sleep(delay)
                 continue
 
+            text_lower = (response.text or "").lower()
+
             if "resource not accessible by integration" in text_lower or "private" in text_lower:
                 raise RuntimeError(
                     f"GitHub API access forbidden (403) for {owner}/{repo}/{path}.\n"
@@ -319,55 +855,402 @@ def _request_contents_json(
     raise RuntimeError("GitHub request failed unexpectedly.")
 
 
-def fetch_repo(owner: str, repo: str, token: Optional[str] = None) -> dict:
-    session = _make_session(token)
+_README_CANDIDATES = (
+    "README.md",
+    "readme.md",
+    "README.MD",
+    "README.rst",
+    "README.txt",
+    "README",
+)
+
+# GitHub scores a query by the nodes it may return; 50 blob lookups per query
+# keeps each batch at a cost of 1 point and well under the node limit.
+_GRAPHQL_BLOBS_PER_QUERY = 50
+
+_GRAPHQL_OVERVIEW_QUERY = """
+query($owner: String!, $name: String!%s) {
+  rateLimit { cost remaining limit resetAt }
+  repository(owner: $owner, name: $name) {
+    name
+    nameWithOwner
+    description
+    isFork
+    isPrivate
+    owner { login }
+    parent { nameWithOwner }
+    defaultBranchRef { name }
+    languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+      edges { size node { name } }
+    }
+%s
+  }
+}
+"""
+
+
+def _graphql_url() -> str:
+    return f"{GITHUB_API_BASE}/graphql"
+
+
+def _record_graphql_rate_limit(client: GitHubClient, data: dict) -> None:
+    rate = data.get("rateLimit")
+    if not isinstance(rate, dict):
+        return
+    try:
+        client.graphql_rate_limit = GraphQLRateLimit(
+            cost=int(rate.get("cost") or 0),
+            remaining=int(rate.get("remaining") or 0),
+            limit=int(rate.get("limit") or 0),
+            reset_at=str(rate.get("resetAt") or ""),
+        )
+    except (TypeError, ValueError):
+        pass
+
+
+def _request_graphql(
+    client: GitHubClient,
+    query: str,
+    variables: dict,
+    *,
+    owner: str,
+    repo: str,
+    retries: int = 2,
+) -> dict:
+    # Every query below costs one point; refuse to send it if the last
+    # response told us the budget cannot cover that.
+    known = client.graphql_rate_limit
+    if known is not None and known.remaining < 1:
+        raise RuntimeError(
+            "GitHub GraphQL rate limit exceeded.\n"
+            f"Resets at {known.reset_at or 'an unknown time'}.\n"
+            "Fix:\n"
+            "- Retry later or use --fetch-backend contents\n"
+        )
+
+    backoff = 1.5
+    payload = {"query": query, "variables": variables}
+
+    for attempt in range(retries + 1):
+        try:
+            response = client.post(_graphql_url(), json=payload)
+        except requests.RequestException as e:
+            if attempt == retries:
+                raise RuntimeError(f"Network error while calling GitHub: {e}") from e
+            time.sleep(backoff)
+            backoff *= 2
+            continue
+
+        if response.status_code == 200:
+            break
+
+        if response.status_code in (403, 429):
+            delay = client.scheduler.retry_delay(response, attempt)
+            if delay is None or attempt == retries:
+                raise RuntimeError(_rate_limit_message(response))
+            time.sleep(delay)
+            continue
+
+        if response.status_code == 401:
+            raise RuntimeError(
+                "GitHub GraphQL API rejected the token (401).\n"
+                "Check that GITHUB_TOKEN is valid."
+            )
+
+        if 500 <= response.status_code <= 599 and attempt < retries:
+            time.sleep(backoff)
+            backoff *= 2
+            continue
+
+        raise RuntimeError(f"GitHub GraphQL request failed ({response.status_code}).")
+
+    try:
+        body = response.json()
+    except ValueError as e:
+        raise RuntimeError("GitHub GraphQL API returned invalid JSON.") from e
+
+    data = body.get("data") if isinstance(body, dict) else None
+    if isinstance(data, dict):
+        _record_graphql_rate_limit(client, data)
+
+    errors = body.get("errors") if isinstance(body, dict) else None
+    if errors:
+        types = {str(err.get("type") or "") for err in errors if isinstance(err, dict)}
+        if "NOT_FOUND" in types:
+            raise RuntimeError(
+                "Repository not found.\n"
+                "If this is a private repository, configure GitHub access:\n"
+                "- Run `explainthisrepo init`\n"
+                "- Or set GITHUB_TOKEN (see https://github.com/calchiwo/ExplainThisRepo/blob/main/docs/GITHUB_TOKEN.md)"
+            )
+        if "RATE_LIMITED" in types:
+            raise RuntimeError(
+                "GitHub GraphQL rate limit exceeded.\n"
+                "Fix:\n"
+                "- Retry later or use --fetch-backend contents\n"
+            )
+        if not isinstance(data, dict):
+            message = next(
+                (str(err.get("message")) for err in errors if isinstance(err, dict)),
+                "unknown error",
+            )
+            raise RuntimeError(
+                f"GitHub GraphQL request failed for {owner}/{repo}: {message}"
+            )
+
+    if not isinstance(data, dict):
+        raise RuntimeError(f"GitHub GraphQL API returned no data for {owner}/{repo}.")
+
+    return data
+
+
+def _blob_text(node: object) -> Optional[str]:
+    if not isinstance(node, dict):
+        return None
+    text = node.get("text")
+    if not isinstance(text, str) or node.get("isBinary"):
+        return None
+    return text
+
+
+def fetch_files_graphql(
+    owner: str,
+    repo: str,
+    paths: list[str],
+    token: Optional[str] = None,
+    ref: str = "HEAD",
+) -> dict[str, str]:
+    client = get_client(token)
+    normalized = [_normalize_github_path(p) for p in paths]
+    found: dict[str, str] = {}
+
+    for start in range(0, len(normalized), _GRAPHQL_BLOBS_PER_QUERY):
+        batch = normalized[start : start + _GRAPHQL_BLOBS_PER_QUERY]
+        params = ", ".join(f"$e{i}: String!" for i in range(len(batch)))
+        fields = "\n".join(
+            f"    f{i}: object(expression: $e{i}) {{ ... on Blob {{ text isBinary }} }}"
+            for i in range(len(batch))
+        )
+        query = (
+            f"query($owner: String!, $name: String!, {params}) {{\n"
+            "  rateLimit { cost remaining limit resetAt }\n"
+            "  repository(owner: $owner, name: $name) {\n"
+            f"{fields}\n"
+            "  }\n"
+            "}"
+        )
+        variables: dict[str, str] = {"owner": owner, "name": repo}
+        for i, path in enumerate(batch):
+            variables[f"e{i}"] = f"{ref}:{path}"
+
+        data = _request_graphql(client, query, variables, owner=owner, repo=repo)
+        node = data.get("repository") or {}
+
+        for i, path in enumerate(batch):
+            text = _blob_text(node.get(f"f{i}"))
+            if text:
+                found[path] = text
+
+    return found
+
+
+def is_object_id(value: Optional[str]) -> bool:
+    return bool(value) and _OBJECT_ID_RE.match(value.lower()) is not None
+
+
+def resolve_commit(
+    owner: str,
+    repo: str,
+    ref: Optional[str] = None,
+    token: Optional[str] = None,
+) -> Optional[str]:
+    # The sha media type answers with just the 40-character id; against a
+    # cached ETag an unchanged ref costs one 304.
+    client = get_client(token)
+    url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/commits/{quote(ref or 'HEAD')}"
+    text = _request_text(client, url, accept="application/vnd.github.sha", retries=2)
+    sha = (text or "").strip().lower()
+    return sha if is_object_id(sha) else None
+
+
+def fetch_repo(
+    owner: str,
+    repo: str,
+    token: Optional[str] = None,
+    ref: Optional[str] = None,
+) -> dict:
+    # ref only matters to GraphQL, where the same query also reads the
+    # README at that ref for fetch_readme.
+    client = get_client(token)
+    if client.use_graphql:
+        return dict(client.graphql_overview(owner, repo, ref)["repo"])
+
     url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}"
-    return _request_json(session, url)
+    return _request_json(client, url)
+
 
+def _readme_probe_urls(
+    owner: str,
+    repo: str,
+    token: Optional[str],
+    tree: Optional[list[dict]],
+    ref: Optional[str] = None,
+) -> list[str]:
+    if ref:
+        branches = [ref]
+    else:
+        try:
+            default_branch = fetch_repo(owner, repo, token=token).get("default_branch")
+        except RuntimeError:
+            default_branch = None
+        branches = [default_branch] if default_branch else ["main", "master"]
+
+    if tree is not None:
+        names = [
+            str(item.get("path"))
+            for item in tree
+            if item.get("type") == "blob"
+            and "/" not in str(item.get("path") or "")
+            and str(item.get("path") or "").lower().startswith("readme")
+        ]
+    else:
+        names = list(_README_CANDIDATES)
+
+    return [
+        f"{GITHUB_RAW_BASE}/{owner}/{repo}/{branch}/{quote(name)}"
+        for branch in branches
+        for name in names
+    ]
+
+
+def _first_text(client: GitHubClient, urls: list[str]) -> Optional[str]:
+    if not urls:
+        return None
 
-def fetch_readme(owner: str, repo: str, token: Optional[str] = None) -> str | None:
-    session = _make_session(token)
+    pool = ThreadPoolExecutor(max_workers=min(len(urls), _README_PROBE_WORKERS))
+    try:
+        pending = {
+            pool.submit(
+                _request_text,
+                client,
+                url,
+                accept="text/plain",
+                timeout=10,
+                retries=2,
+            )
+            for url in urls
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                text = future.result()
+                if text:
+                    return text
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return None
+
+
+def fetch_readme(
+    owner: str,
+    repo: str,
+    token: Optional[str] = None,
+    tree: Optional[list[dict]] = None,
+    ref: Optional[str] = None,
+) -> str | None:
+    client = get_client(token)
+    if client.use_graphql:
+        return client.graphql_overview(owner, repo, ref or "HEAD")["readme"]
 
     api_url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/readme"
+    if ref:
+        api_url += f"?ref={quote(ref, safe='')}"
     text = _request_text(
-        session,
+        client,
         api_url,
         accept="application/vnd.github.v3.raw",
+        immutable=is_object_id(ref),
     )
     if text:
         return text
 
-    branches = ["main", "master"]
-    filenames = ["README.md", "readme.md", "README.MD"]
+    # The API call is cheap to revalidate; the raw probes behind it are not,
+    # so a repository recently found to have no README skips them.
+    misses = client.negative_cache()
+    identity = auth_identity(client.token)
+    miss_key = f"readme:{identity}:{owner}/{repo}@{ref or ''}".lower()
+    if misses is not None:
+        try:
+            if misses.get(miss_key) is not None:
+                return None
+        except Exception:
+            misses = None
 
-    for branch in branches:
-        for name in filenames:
-            raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{name}"
-            raw = _request_text(
-                session,
-                raw_url,
-                accept="text/plain",
-                timeout=10,
-                retries=2,
-            )
-            if raw:
-                return raw
+    raw = _first_text(client, _readme_probe_urls(owner, repo, token, tree, ref))
+    if raw:
+        return raw
+
+    if misses is not None:
+        try:
+            misses.put(miss_key, b"", ttl=_README_MISS_TTL)
+        except Exception:
+            pass
 
     return None
 
 
-def fetch_tree(owner: str, repo: str, token: Optional[str] = None) -> list[dict]:
-    session = _make_session(token)
-    repo_meta = fetch_repo(owner, repo, token=token)
-    branch = repo_meta.get("default_branch") or "main"
+@dataclass(frozen=True)
+class GitTree:
+    sha: str
+    entries: list[dict]
+    truncated: bool
 
-    url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
-    data = _request_json(session, url)
 
-    tree = data.get("tree", [])
-    if not isinstance(tree, list):
-        return []
-    return tree
+def fetch_git_tree(
+    owner: str,
+    repo: str,
+    tree_ref: str,
+    recursive: bool = False,
+    token: Optional[str] = None,
+) -> GitTree:
+    client = get_client(token)
+    url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/git/trees/{tree_ref}"
+    if recursive:
+        url += "?recursive=1"
+
+    data = _request_json(client, url, immutable=is_object_id(tree_ref))
+
+    entries = data.get("tree", [])
+    if not isinstance(entries, list):
+        entries = []
+
+    return GitTree(
+        sha=str(data.get("sha") or ""),
+        entries=[item for item in entries if isinstance(item, dict)],
+        truncated=bool(data.get("truncated")),
+    )
+
+
+def fetch_tree_listing(
+    owner: str,
+    repo: str,
+    token: Optional[str] = None,
+    ref: Optional[str] = None,
+) -> GitTree:
+    if not ref:
+        repo_meta = fetch_repo(owner, repo, token=token)
+        ref = repo_meta.get("default_branch") or "main"
+    return fetch_git_tree(owner, repo, ref, recursive=True, token=token)
+
+
+def fetch_tree(
+    owner: str,
+    repo: str,
+    token: Optional[str] = None,
+    ref: Optional[str] = None,
+) -> list[dict]:
+    return fetch_tree_listing(owner, repo, token=token, ref=ref).entries
 
 
 def fetch_file(
@@ -375,37 +1258,145 @@ def fetch_file(
     repo: str,
     file_path: str,
     token: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    ref: Optional[str] = None,
 ) -> str | None:
-    session = _make_session(token)
+    content = fetch_file_content(owner, repo, file_path, token, max_bytes, ref)
+    return content[1] if content is not None else None
+
+
+def fetch_file_content(
+    owner: str,
+    repo: str,
+    file_path: str,
+    token: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    ref: Optional[str] = None,
+) -> Optional[tuple[bytes, str]]:
+    client = get_client(token)
     url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{file_path}"
-    return _request_text(
-        session,
+    if ref:
+        url += f"?ref={quote(ref, safe='')}"
+    return _request_content(
+        client,
         url,
         accept="application/vnd.github.v3.raw",
         timeout=10,
         retries=2,
+        max_bytes=max_bytes,
     )
 
 
-def fetch_file_result(
+class _BoundedStream:
+    def __init__(self, raw, max_bytes: int, max_seconds: float, label: str) -> None:
+        self._raw = raw
+        self._max_bytes = max_bytes
+        self._deadline = time.monotonic() + max_seconds
+        self._label = label
+        self.consumed = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if time.monotonic() > self._deadline:
+            raise ArchiveLimitError(
+                f"GitHub archive for {self._label} took too long to download."
+            )
+        data = self._raw.read(size)
+        self.consumed += len(data)
+        if self.consumed > self._max_bytes:
+            raise ArchiveLimitError(
+                f"GitHub archive for {self._label} is larger than "
+                f"{self._max_bytes // (1024 * 1024)} MB."
+            )
+        return data
+
+
+def fetch_archive_files(
     owner: str,
     repo: str,
-    file_path: str,
+    paths: list[str],
     token: Optional[str] = None,
+    ref: Optional[str] = None,
     max_bytes: int = _MAX_FILE_BYTES,
-) -> FileReadResult:
-    normalized_path = _normalize_github_path(file_path)
-    session = _make_session(token)
-    url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{_quote_github_path(normalized_path)}"
+    timeout: int = 30,
+    max_download_bytes: int = _ARCHIVE_MAX_DOWNLOAD_BYTES,
+    max_seconds: float = _ARCHIVE_MAX_SECONDS,
+) -> dict[str, bytes]:
+    # Raw member bytes, cut at max_bytes; decoding is left to the caller.
+    wanted = {_normalize_github_path(p) for p in paths}
+    if not wanted:
+        return {}
+
+    client = get_client(token)
+    url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/tarball"
+    if ref:
+        url = f"{url}/{quote(ref, safe='')}"
 
-    payload = _request_contents_json(
-        session,
-        url,
-        owner=owner,
-        repo=repo,
-        path=normalized_path,
-    )
+    try:
+        response = client.get(url, timeout=timeout, stream=True)
+    except requests.RequestException as e:
+        raise RuntimeError(
+            f"Network error while downloading GitHub archive: {e}"
+        ) from e
+
+    found: dict[str, bytes] = {}
+
+    try:
+        if response.status_code == 404:
+            raise RuntimeError(f"GitHub archive not found for {owner}/{repo}.")
+        if response.status_code in (403, 429):
+            raise RuntimeError(_rate_limit_message(response))
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"GitHub archive request failed ({response.status_code}) "
+                f"for {owner}/{repo}."
+            )
+
+        response.raw.decode_content = True
+        stream = _BoundedStream(
+            response.raw, max_download_bytes, max_seconds, f"{owner}/{repo}"
+        )
+
+        # Streaming mode reads members strictly in order and never seeks, so
+        # memory stays bounded by max_bytes per kept file and the download is
+        # abandoned as soon as the last wanted member has gone past, or once
+        # the byte or time budget runs out.
+        try:
+            with tarfile.open(fileobj=stream, mode="r|gz") as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+
+                    # Members are prefixed with "{owner}-{repo}-{sha}/".
+                    _, _, member_path = member.name.partition("/")
+                    if member_path not in wanted or member_path in found:
+                        continue
+
+                    handle = archive.extractfile(member)
+                    if handle is None:
+                        continue
 
+                    found[member_path] = handle.read(max_bytes)
+
+                    if len(found) >= len(wanted):
+                        break
+        except (tarfile.TarError, OSError, EOFError, Urllib3HTTPError) as e:
+            raise RuntimeError(
+                f"Failed to read GitHub archive for {owner}/{repo}: {e}"
+            ) from e
+    finally:
+        response.close()
+
+    return found
+
+
+def _file_result_from_payload(
+    payload: object,
+    *,
+    owner: str,
+    repo: str,
+    normalized_path: str,
+    max_bytes: int,
+) -> FileReadResult:
     if isinstance(payload, list):
         raise RuntimeError(
             f"GitHub path resolves to a directory, not a file: {owner}/{repo}/{normalized_path}"
@@ -442,6 +1433,140 @@ def fetch_file_result(
     except Exception:
         size_bytes = len(raw)
 
+    sha = payload.get("sha")
+    put_blob(sha if isinstance(sha, str) else None, raw, complete=True)
+
+    return build_file_read_result(
+        path=normalized_path,
+        raw=raw,
+        size_bytes=size_bytes,
+        max_bytes=max_bytes,
+    )
+
+
+def fetch_file_entry(
+    owner: str,
+    repo: str,
+    file_path: str,
+    token: Optional[str] = None,
+) -> Optional[dict]:
+    # The file's contents entry carries its blob SHA and size. It is the
+    # response the directory probe in front of file mode already got, so
+    # the client's per-run memo answers this without another request.
+    normalized_path = _normalize_github_path(file_path)
+    client = get_client(token)
+    quoted = _quote_github_path(normalized_path)
+    url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{quoted}"
+
+    try:
+        entry = _request_contents_json(
+            client,
+            url,
+            owner=owner,
+            repo=repo,
+            path=normalized_path,
+            retries=1,
+        )
+    except RuntimeError:
+        return None
+
+    if isinstance(entry, dict) and entry.get("type") == "file":
+        return entry
+    return None
+
+
+def _listed_size(
+    owner: str,
+    repo: str,
+    normalized_path: str,
+    token: Optional[str],
+) -> Optional[int]:
+    entry = fetch_file_entry(owner, repo, normalized_path, token=token)
+    if entry is None:
+        return None
+    try:
+        return int(entry.get("size"))
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_file_result(
+    owner: str,
+    repo: str,
+    file_path: str,
+    token: Optional[str] = None,
+    max_bytes: int = _MAX_FILE_BYTES,
+    size_bytes: Optional[int] = None,
+    sha: Optional[str] = None,
+) -> FileReadResult:
+    normalized_path = _normalize_github_path(file_path)
+
+    cached = get_blob(sha, max_bytes)
+    if cached is not None:
+        if size_bytes is None:
+            size_bytes = get_blob_size(sha)
+        return build_file_read_result(
+            path=normalized_path,
+            raw=cached,
+            size_bytes=size_bytes if size_bytes is not None else len(cached),
+            max_bytes=max_bytes,
+        )
+
+    client = get_client(token)
+    url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{_quote_github_path(normalized_path)}"
+
+    # Ask for the raw bytes and stop after max_bytes instead of pulling the
+    # whole file as base64 JSON and truncating it afterwards.
+    response = _request_contents(
+        client,
+        url,
+        owner=owner,
+        repo=repo,
+        path=normalized_path,
+        headers=_range_headers("application/vnd.github.v3.raw", max_bytes),
+        stream=True,
+    )
+
+    content_type = (response.headers.get("Content-Type") or "").lower()
+    if content_type.startswith("application/json"):
+        # Directories, symlinks and submodules come back as JSON metadata
+        # even when the raw media type is requested.
+        try:
+            payload = response.json()
+        except ValueError as e:
+            raise RuntimeError(
+                "GitHub API returned unexpected data for "
+                f"{owner}/{repo}/{normalized_path}."
+            ) from e
+        return _file_result_from_payload(
+            payload,
+            owner=owner,
+            repo=repo,
+            normalized_path=normalized_path,
+            max_bytes=max_bytes,
+        )
+
+    try:
+        raw, total = _read_prefix(response, max_bytes)
+    except (requests.RequestException, Urllib3HTTPError, OSError) as e:
+        raise RuntimeError(f"Network error while calling GitHub: {e}") from e
+
+    if not raw:
+        raise RuntimeError(
+            f"GitHub file content is unavailable for {owner}/{repo}/{normalized_path}."
+        )
+
+    if size_bytes is None:
+        size_bytes = total
+    if size_bytes is None:
+        # Last resort when the caller had no tree entry and the response
+        # carried neither a usable Content-Range nor a Content-Length.
+        size_bytes = _listed_size(owner, repo, normalized_path, token)
+    if size_bytes is None:
+        size_bytes = len(raw)
+
+    put_blob(sha, raw, complete=size_bytes <= len(raw), size=size_bytes)
+
     return build_file_read_result(
         path=normalized_path,
         raw=raw,
@@ -457,11 +1582,11 @@ def fetch_directory_contents(
     token: Optional[str] = None,
 ) -> list[dict]:
     normalized_path = _normalize_github_path(directory_path)
-    session = _make_session(token)
+    client = get_client(token)
     url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{_quote_github_path(normalized_path)}"
 
     payload = _request_contents_json(
-        session,
+        client,
         url,
         owner=owner,
         repo=repo,
@@ -495,6 +1620,9 @@ def fetch_directory_contents(
 
 
 def fetch_languages(owner: str, repo: str, token: Optional[str] = None) -> dict:
-    session = _make_session(token)
+    client = get_client(token)
+    if client.use_graphql:
+        return dict(client.graphql_overview(owner, repo)["languages"])
+
     url = f"{GITHUB_API_BASE}/repos/{owner}/{repo}/languages"
-    return _request_json(session, url)
\ No newline at end of file
+    return _request_json(client, url)
\ No newline at end of file
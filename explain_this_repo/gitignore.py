@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+
+@dataclass
+class _Rule:
+    regex: re.Pattern
+    negated: bool
+    dir_only: bool
+
+
+@dataclass
+class IgnoreRules:
+    # Patterns from one ignore file, matched against paths relative to the
+    # directory the file lives in ("" for the repository root).
+    base: str = ""
+    rules: list[_Rule] = field(default_factory=list)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        if self.base:
+            if not rel_path.startswith(f"{self.base}/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1 :]
+
+        # The last matching pattern in a file decides.
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(rel_path):
+                return not rule.negated
+        return None
+
+
+def _translate(pattern: str) -> str:
+    out: list[str] = []
+    i, n = 0, len(pattern)
+
+    while i < n:
+        c = pattern[i]
+
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                after = pattern[i + 2 : i + 3]
+                if after == "/":
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+                if after == "":
+                    out.append(".*")
+                    i += 2
+                    continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            out.append("[^/]*")
+            continue
+
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : j]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    return "".join(out)
+
+
+def _compile_rule(line: str) -> Optional[_Rule]:
+    line = line.rstrip("\r\n")
+    if not line or line.startswith("#"):
+        return None
+
+    while line.endswith(" ") and not line.endswith("\\ "):
+        line = line[:-1]
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    if dir_only:
+        line = line[:-1]
+
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the ignore file's
+    # directory; otherwise it matches a name at any depth below it.
+    anchored = "/" in line
+    if line.startswith("/"):
+        line = line[1:]
+
+    regex = _translate(line)
+    if not anchored:
+        regex = f"(?:.*/)?{regex}"
+
+    try:
+        compiled = re.compile(f"{regex}\\Z", re.DOTALL)
+    except re.error:
+        return None
+    return _Rule(regex=compiled, negated=negated, dir_only=dir_only)
+
+
+def parse_ignore_rules(lines: Iterable[str], base: str = "") -> IgnoreRules:
+    rules = [rule for rule in map(_compile_rule, lines) if rule is not None]
+    return IgnoreRules(base=base, rules=rules)
+
+
+def is_ignored(stack: list[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    # Deeper ignore files take precedence over the ones above them, and all
+    # of them over .git/info/exclude at the bottom of the stack.
+    for rules in reversed(stack):
+        result = rules.match(rel_path, is_dir)
+        if result is not None:
+            return result
+    return False
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import hashlib
+import io
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from explain_this_repo.cache import CacheEntry, CacheStore
+
+HTTP_CACHE_NAME = "http"
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Only headers that callers actually read are persisted with the body.
+_STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+
+def cache_key(url: str, accept: str, identity: str) -> str:
+    raw = f"{identity}\n{accept}\n{url}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def auth_identity(token: Optional[str]) -> str:
+    if not token:
+        return "anonymous"
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+class HttpCache:
+    def __init__(self, store: Optional[CacheStore] = None) -> None:
+        self.store = store or CacheStore(HTTP_CACHE_NAME, HTTP_CACHE_MAX_BYTES)
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        try:
+            return self.store.get(key)
+        except Exception:
+            return None
+
+    def conditional_headers(self, entry: CacheEntry) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        stored = entry.meta.get("headers") or {}
+        etag = stored.get("ETag")
+        last_modified = stored.get("Last-Modified")
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def save(
+        self,
+        key: str,
+        response: requests.Response,
+        immutable: bool = False,
+    ) -> None:
+        headers = {
+            name: response.headers[name]
+            for name in _STORED_HEADERS
+            if response.headers.get(name)
+        }
+        if not immutable and "ETag" not in headers and "Last-Modified" not in headers:
+            return
+
+        meta: dict = {"headers": headers}
+        if immutable:
+            meta["immutable"] = True
+
+        try:
+            self.store.put(key, response.content, meta)
+        except Exception:
+            pass
+
+    def replay(
+        self,
+        entry: CacheEntry,
+        url: str,
+        revalidation: Optional[requests.Response] = None,
+    ) -> requests.Response:
+        headers = CaseInsensitiveDict(entry.meta.get("headers") or {})
+        if revalidation is not None:
+            # A 304 carries fresh rate-limit headers; keep the cached body's
+            # content headers.
+            for name, value in revalidation.headers.items():
+                if name.lower() in (
+                    "content-length",
+                    "content-encoding",
+                    "transfer-encoding",
+                ):
+                    continue
+                headers[name] = value
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = url
+        response.headers = headers
+        response.raw = io.BytesIO(entry.value)
+        response.encoding = requests.utils.get_encoding_from_headers(headers)
+        return response
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Optional
+
+from explain_this_repo.cache import CacheStore, opened_store, shared_store
+
+LLM_CACHE_NAME = "llm"
+LLM_CACHE_MAX_BYTES = 64 * 1024 * 1024
+LLM_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Provider settings that never change what the model writes.
+_IGNORED_PARAMS = frozenset({"api_key", "token", "base_url", "host"})
+
+_store: Optional[CacheStore] = None
+_store_lock = threading.Lock()
+_refresh = False
+
+
+def refresh_responses() -> None:
+    # Skip lookups but keep writing, so a refreshed answer replaces the old one.
+    global _refresh
+    _refresh = True
+
+
+def refresh_requested() -> bool:
+    return _refresh
+
+
+def _llm_store() -> Optional[CacheStore]:
+    return shared_store(LLM_CACHE_NAME, LLM_CACHE_MAX_BYTES)
+
+
+def _generation_params(provider: Any) -> dict[str, Any]:
+    config = getattr(provider, "config", None)
+    if not isinstance(config, dict):
+        return {}
+    return {
+        key: value
+        for key, value in config.items()
+        if key not in _IGNORED_PARAMS and key != "model"
+    }
+
+
+def _provider_key(provider: Any, **parts: Any) -> str:
+    material = json.dumps(
+        {
+            "provider": getattr(provider, "name", type(provider).__name__),
+            "model": getattr(provider, "model", None),
+            "params": _generation_params(provider),
+            **parts,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def provider_fingerprint(provider: Any) -> str:
+    return _provider_key(provider)
+
+
+def response_key(prompt: str, provider: Any) -> str:
+    return _provider_key(
+        provider, prompt=hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    )
+
+
+def subject_key(subject: str, provider: Any) -> str:
+    # A subject names immutable input (e.g. a repository at a commit plus the
+    # output mode), so its explanation can be found without rebuilding the
+    # prompt at all.
+    return _provider_key(provider, subject=subject)
+
+
+def get_response(key: str) -> Optional[str]:
+    store = _llm_store()
+    if store is None or _refresh:
+        return None
+
+    try:
+        entry = store.get(key)
+    except Exception:
+        return None
+
+    if entry is None:
+        store.count("misses")
+        return None
+
+    store.count("hits")
+    return entry.value.decode("utf-8", errors="replace")
+
+
+def put_response(key: str, text: str, meta: Optional[dict[str, Any]] = None) -> None:
+    store = _llm_store()
+    if store is None:
+        return
+
+    try:
+        store.put(key, text.encode("utf-8"), meta, ttl=LLM_CACHE_TTL)
+    except Exception:
+        pass
+
+
+def llm_counters() -> tuple[int, int]:
+    store = opened_store(LLM_CACHE_NAME)
+    if store is None:
+        return 0, 0
+    return store.counters.hits, store.counters.misses
@@ -1,8 +1,23 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, Optional
+
+from explain_this_repo.git_index import git_ls_files, read_index_paths
+from explain_this_repo.gitignore import IgnoreRules, is_ignored, parse_ignore_rules
+from explain_this_repo.scan_index import ScanIndex, load_scan_index, save_scan_index
+from explain_this_repo.selection import (
+    collect_snippets,
+    format_files_snippets,
+    iter_ranked,
+    pick_signal_files,
+)
 
 
 @dataclass
@@ -11,6 +26,9 @@ class LocalReadResult:
     tree_text: str
     key_files: dict[str, str]
     files_text: str
+    readme: Optional[str] = None
+    truncated: bool = False
+    truncation_reason: Optional[str] = None
 
 
 _KEY_FILENAMES = {
@@ -42,6 +60,21 @@ _KEY_FILENAMES = {
     "webpack.config.js",
 }
 
+# Signals a local read can be asked for, cheapest first.
+LOCAL_PARTS = ("readme", "top_level", "tree", "key_files", "files")
+
+_README_NAMES = (
+    "README.md",
+    "readme.md",
+    "Readme.md",
+    "README",
+    "readme",
+    "README.rst",
+    "readme.rst",
+    "README.txt",
+    "readme.txt",
+)
+
 _SKIP_DIRS = {
     ".git",
     ".hg",
@@ -63,6 +96,13 @@ _SKIP_DIRS = {
     "htmlcov",
 }
 
+# Hard limits on a local scan; anything past them is left out of the tree
+# and the result says which limit was hit.
+MAX_TREE_ENTRIES = 20_000
+MAX_TREE_DEPTH = 24
+MAX_SCAN_SECONDS = 20.0
+DEFAULT_SCAN_CONCURRENCY = 8
+
 _MAX_FILE_BYTES = 32_000
 _MAX_KEY_FILES = 12
 
@@ -76,15 +116,291 @@ def _read_text_file(path: Path, max_bytes: int) -> str:
         return handle.read(max_bytes)
 
 
-def _build_files_text(key_files: dict[str, str]) -> str:
-    if not key_files:
-        return ""
-    return "\n\n".join(
-        f"### {rel_path}\n{content}" for rel_path, content in key_files.items()
+def _list_directory(
+    full_path: Path,
+    rel_dir: str,
+    previous: ScanIndex,
+    current: ScanIndex,
+) -> Optional[tuple[list[str], list[str]]]:
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        return None
+
+    # A directory's mtime moves whenever an entry is added, removed or
+    # renamed in it, so an unchanged mtime means its listing is unchanged.
+    cached = previous.dirs.get(rel_dir)
+    if (
+        cached
+        and cached[0] == stat.st_mtime_ns
+        and cached[1] == stat.st_ino
+        and previous.is_fresh(stat.st_mtime_ns)
+    ):
+        filenames, dirnames = cached[2], cached[3]
+    else:
+        filenames, dirnames = [], []
+        try:
+            with os.scandir(full_path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        filenames.append(entry.name)
+                    elif not entry.is_symlink():
+                        dirnames.append(entry.name)
+        except OSError:
+            return None
+        filenames.sort()
+        dirnames.sort()
+
+    current.dirs[rel_dir] = [stat.st_mtime_ns, stat.st_ino, filenames, dirnames]
+    return filenames, dirnames
+
+
+def _read_key_file(
+    full_path: Path,
+    rel_path: str,
+    previous: ScanIndex,
+    current: ScanIndex,
+) -> Optional[str]:
+    try:
+        stat = full_path.stat()
+    except OSError:
+        return None
+
+    signature = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+    cached = previous.files.get(rel_path)
+    if cached and cached[:3] == signature and previous.is_fresh(stat.st_mtime_ns):
+        content = cached[4]
+    else:
+        try:
+            content = _read_text_file(full_path, _MAX_FILE_BYTES)
+        except OSError:
+            return None
+
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    current.files[rel_path] = [*signature, digest, content]
+    return content
+
+
+def _tree_order(rel_path: str) -> str:
+    # Same order as the directory walk: a directory's files, then each of
+    # its subdirectories in turn, names sorted at every level. Directory
+    # components sort after file names and NUL ends each component.
+    head, _, filename = rel_path.rpartition("/")
+    if not head:
+        return f"\x01{filename}"
+    return "\x02" + head.replace("/", "\x00\x02") + "\x00\x01" + filename
+
+
+def _cap_entries(tree_lines: list[str]) -> tuple[list[str], Optional[str]]:
+    if len(tree_lines) <= MAX_TREE_ENTRIES:
+        return tree_lines, None
+
+    # Shallow entries describe the layout best, so those are kept first;
+    # the survivors stay in tree order.
+    ranked = sorted(range(len(tree_lines)), key=lambda i: (tree_lines[i].count("/"), i))
+    kept = sorted(ranked[:MAX_TREE_ENTRIES])
+    reason = f"more than {MAX_TREE_ENTRIES} entries"
+    return [tree_lines[i] for i in kept], reason
+
+
+def _git_tree(root: Path) -> Optional[tuple[list[str], Optional[str]]]:
+    paths = git_ls_files(root)
+    if paths is None and (root / ".git").is_dir():
+        paths = read_index_paths(root)
+
+    if not paths:
+        return None
+
+    # Paths arrive grouped by directory, so each one is checked once.
+    skipped: dict[str, bool] = {"": False}
+    kept = []
+    too_deep = False
+    for path in paths:
+        head = path.rpartition("/")[0]
+        skip = skipped.get(head)
+        if skip is None:
+            parts = head.split("/")
+            skip = not _SKIP_DIRS.isdisjoint(parts)
+            if not skip and len(parts) > MAX_TREE_DEPTH:
+                skip = too_deep = True
+            skipped[head] = skip
+        if not skip:
+            kept.append(path)
+
+    tree_lines, reason = _cap_entries(sorted(kept, key=_tree_order))
+    if reason is None and too_deep:
+        reason = f"directories nested deeper than {MAX_TREE_DEPTH} levels"
+    return tree_lines, reason
+
+
+def _load_ignore_file(
+    full_path: Path,
+    rel_path: str,
+    base: str,
+    previous: ScanIndex,
+    current: ScanIndex,
+) -> Optional[IgnoreRules]:
+    content = _read_key_file(full_path, rel_path, previous, current)
+    if not content:
+        return None
+    rules = parse_ignore_rules(content.splitlines(), base=base)
+    return rules if rules.rules else None
+
+
+def _walk_tree(
+    root: Path,
+    previous: ScanIndex,
+    current: ScanIndex,
+    concurrency: int = DEFAULT_SCAN_CONCURRENCY,
+) -> tuple[list[str], Optional[str]]:
+    root_rules: list[IgnoreRules] = []
+    exclude = _load_ignore_file(
+        root / ".git" / "info" / "exclude", ".git/info/exclude", "", previous, current
     )
+    if exclude is not None:
+        root_rules.append(exclude)
+
+    def visit(
+        node: tuple[str, int, list[IgnoreRules]],
+    ) -> Optional[tuple[list[str], list[str], list[IgnoreRules]]]:
+        rel_dir, _, rules = node
+        listing = _list_directory(root / rel_dir, rel_dir, previous, current)
+        if listing is None:
+            return None
+
+        filenames, dirnames = listing
+        prefix = f"{rel_dir}/" if rel_dir else ""
+
+        if ".gitignore" in filenames:
+            local = _load_ignore_file(
+                root / f"{prefix}.gitignore",
+                f"{prefix}.gitignore",
+                rel_dir,
+                previous,
+                current,
+            )
+            if local is not None:
+                rules = [*rules, local]
+
+        # Ignored entries are dropped by name, so nothing below an ignored
+        # directory is ever listed or stat'ed.
+        if rules:
+            filenames = [
+                name
+                for name in filenames
+                if not is_ignored(rules, f"{prefix}{name}", False)
+            ]
+        dirnames = [
+            name
+            for name in dirnames
+            if name not in _SKIP_DIRS
+            and not (rules and is_ignored(rules, f"{prefix}{name}", True))
+        ]
+        return filenames, dirnames, rules
+
+    listings: dict[str, tuple[list[str], list[str]]] = {}
+    frontier: deque[tuple[str, int, list[IgnoreRules]]] = deque([("", 0, root_rules)])
+    entries = 0
+    reason: Optional[str] = None
+    deadline = time.monotonic() + MAX_SCAN_SECONDS
+
+    # Breadth-first, a batch of directory listings at a time. Limits are only
+    # checked between batches, so the same tree always stops at the same
+    # place (except for the time limit).
+    window = max(1, concurrency)
+    with ThreadPoolExecutor(max_workers=window) as pool:
+        while frontier:
+            if entries >= MAX_TREE_ENTRIES:
+                reason = f"more than {MAX_TREE_ENTRIES} entries"
+                break
+            if listings and time.monotonic() > deadline:
+                reason = f"scan took longer than {MAX_SCAN_SECONDS:g}s"
+                break
+
+            batch = [frontier.popleft() for _ in range(min(window * 4, len(frontier)))]
+            for node, result in zip(batch, pool.map(visit, batch)):
+                if result is None:
+                    continue
+
+                rel_dir, depth, _ = node
+                filenames, dirnames, rules = result
+                entries += len(filenames)
+
+                if dirnames and depth >= MAX_TREE_DEPTH:
+                    reason = reason or (
+                        f"directories nested deeper than {MAX_TREE_DEPTH} levels"
+                    )
+                    dirnames = []
+
+                listings[rel_dir] = (filenames, dirnames)
+                prefix = f"{rel_dir}/" if rel_dir else ""
+                frontier.extend((f"{prefix}{d}", depth + 1, rules) for d in dirnames)
+
+    # Listings arrive level by level; the tree is laid out depth-first.
+    tree_lines: list[str] = []
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        listing = listings.get(rel_dir)
+        if listing is None:
+            continue
+
+        filenames, dirnames = listing
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        tree_lines.extend(f"{prefix}{name}" for name in filenames)
+        pending.extend(f"{prefix}{d}" for d in reversed(dirnames))
 
+    tree_lines, capped = _cap_entries(tree_lines)
+    return tree_lines, capped or reason
 
-def read_local_repo_signal_files(path: str) -> LocalReadResult:
+
+def _probe_readme(root: Path) -> Optional[str]:
+    # A handful of stat calls at the root instead of a walk.
+    for name in _README_NAMES:
+        candidate = root / name
+        if not candidate.is_file():
+            continue
+        try:
+            return _read_text_file(candidate, _MAX_FILE_BYTES)
+        except OSError:
+            continue
+    return None
+
+
+def _top_level_tree(root: Path) -> list[str]:
+    blank = ScanIndex()
+    listing = _list_directory(root, "", blank, ScanIndex())
+    if listing is None:
+        return []
+
+    filenames, dirnames = listing
+    rules: list[IgnoreRules] = []
+    for ignore_file, rel_path in (
+        (root / ".git" / "info" / "exclude", ".git/info/exclude"),
+        (root / ".gitignore", ".gitignore"),
+    ):
+        loaded = _load_ignore_file(ignore_file, rel_path, "", blank, ScanIndex())
+        if loaded is not None:
+            rules.append(loaded)
+
+    lines = [name for name in filenames if not is_ignored(rules, name, False)]
+    lines.extend(
+        f"{name}/"
+        for name in dirnames
+        if name not in _SKIP_DIRS and not is_ignored(rules, name, True)
+    )
+    return lines
+
+
+def read_local_repo_signal_files(
+    path: str,
+    rescan: bool = False,
+    parts: Iterable[str] = LOCAL_PARTS,
+) -> LocalReadResult:
     root = Path(path).expanduser()
 
     if not root.exists():
@@ -94,39 +410,75 @@ def read_local_repo_signal_files(path: str) -> LocalReadResult:
         raise ValueError(f"Not a directory: {path}")
 
     root = root.resolve()
+    wanted = set(parts)
 
-    tree_lines: list[str] = []
-    key_files: dict[str, str] = {}
+    readme = _probe_readme(root) if "readme" in wanted else None
 
-    for dirpath, dirnames, filenames in os.walk(str(root)):
-        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS)
+    # Modes that only need the README or the top level never walk the tree
+    # or touch the scan index.
+    if not wanted & {"tree", "key_files", "files"}:
+        tree_lines = _top_level_tree(root) if "top_level" in wanted else []
+        return LocalReadResult(
+            tree=tree_lines,
+            tree_text="\n".join(tree_lines),
+            key_files={},
+            files_text="",
+            readme=readme,
+        )
 
-        current_dir = Path(dirpath).relative_to(root)
-        prefix = "" if str(current_dir) == "." else f"{current_dir.as_posix()}/"
+    # The index from the previous scan lets unchanged directories and key
+    # files be taken as they were instead of listed and read again.
+    previous = ScanIndex() if rescan else load_scan_index(root)
+    current = ScanIndex(scanned_at_ns=time.time_ns())
+
+    # Inside a git checkout the index already knows which files count;
+    # elsewhere the walk applies .gitignore files itself.
+    scan = _git_tree(root)
+    if scan is None:
+        scan = _walk_tree(root, previous, current)
+    tree_lines, reason = scan
+
+    key_files: dict[str, str] = {}
+    for rel_path in tree_lines if "key_files" in wanted else []:
+        if len(key_files) >= _MAX_KEY_FILES:
+            break
 
-        for filename in sorted(filenames):
-            rel_path = f"{prefix}{filename}"
-            tree_lines.append(rel_path)
+        if not _is_key_filename(rel_path.rpartition("/")[2]):
+            continue
 
-            if not _is_key_filename(filename):
-                continue
+        content = _read_key_file(root / rel_path, rel_path, previous, current)
+        if content is not None:
+            key_files[rel_path] = content
 
-            if len(key_files) >= _MAX_KEY_FILES:
-                continue
+    # Code files are ranked and read the same way as on GitHub, straight from
+    # disk, so both kinds of target give the model the same files_text.
+    def read(rel_path: str) -> Optional[str]:
+        content = key_files.get(rel_path)
+        if content is None:
+            content = _read_key_file(root / rel_path, rel_path, previous, current)
+        if content and "\x00" in content:
+            return None
+        return content
 
-            full_path = Path(dirpath) / filename
+    files_text = ""
+    if "files" in wanted:
+        snippets = collect_snippets(
+            iter_ranked(pick_signal_files(tree_lines), read, DEFAULT_SCAN_CONCURRENCY)
+        )
+        files_text = format_files_snippets(snippets)
 
-            try:
-                key_files[rel_path] = _read_text_file(full_path, _MAX_FILE_BYTES)
-            except OSError:
-                continue
+    save_scan_index(root, current)
 
     tree_text = "\n".join(tree_lines)
-    files_text = _build_files_text(key_files)
+    if reason:
+        tree_text += f"\n... (tree truncated: {reason})"
 
     return LocalReadResult(
         tree=tree_lines,
         tree_text=tree_text,
         key_files=key_files,
         files_text=files_text,
+        readme=readme,
+        truncated=reason is not None,
+        truncation_reason=reason,
     )
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from explain_this_repo.blob_cache import get_blob
+from explain_this_repo.cache import CacheStore, shared_store
+
+MANIFEST_CACHE_NAME = "manifests"
+MANIFEST_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# An explanation is patched instead of regenerated when at most this many
+# signal files changed, and no more than this share of them.
+MAX_PATCHED_FILES = 5
+MAX_PATCHED_RATIO = 0.25
+
+_MAX_DIFF_CHARS = 6000
+_MAX_DIFFS_CHARS = 24_000
+_DIFF_READ_BYTES = 64_000
+
+
+@dataclass
+class RunManifest:
+    commit: str
+    files: dict[str, str] = field(default_factory=dict)
+    readme_sha: str = ""
+    metadata_sha: str = ""
+    tree_text_sha: str = ""
+    prompt_sha: str = ""
+    output_path: str = ""
+    output: str = ""
+
+
+def text_sha(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _manifest_store() -> Optional[CacheStore]:
+    return shared_store(MANIFEST_CACHE_NAME, MANIFEST_CACHE_MAX_BYTES)
+
+
+def load_manifest(key: str) -> Optional[RunManifest]:
+    store = _manifest_store()
+    if store is None:
+        return None
+
+    try:
+        entry = store.get(key)
+        if entry is None:
+            return None
+        return RunManifest(**json.loads(entry.value.decode("utf-8")))
+    except Exception:
+        return None
+
+
+def save_manifest(key: str, manifest: RunManifest) -> None:
+    store = _manifest_store()
+    if store is None:
+        return
+
+    try:
+        store.put(key, json.dumps(asdict(manifest), sort_keys=True).encode("utf-8"))
+    except Exception:
+        pass
+
+
+def changed_files(previous: RunManifest, files: dict[str, str]) -> list[str]:
+    paths = set(previous.files) | set(files)
+    return sorted(p for p in paths if previous.files.get(p) != files.get(p))
+
+
+def can_patch(changed: list[str], total: int) -> bool:
+    limit = min(MAX_PATCHED_FILES, max(1, int(total * MAX_PATCHED_RATIO)))
+    return 0 < len(changed) <= limit
+
+
+def _blob_lines(sha: Optional[str]) -> Optional[list[str]]:
+    if sha is None:
+        return []
+    data = get_blob(sha, _DIFF_READ_BYTES)
+    if data is None:
+        return None
+    return data.decode("utf-8", errors="replace").splitlines(keepends=True)
+
+
+def render_diffs(
+    previous: dict[str, str],
+    current: dict[str, str],
+    paths: list[str],
+) -> Optional[str]:
+    # Both sides come from the blob cache; if either one has been evicted
+    # the caller falls back to a full regeneration.
+    parts: list[str] = []
+    total = 0
+
+    for path in paths:
+        before = _blob_lines(previous.get(path))
+        after = _blob_lines(current.get(path))
+        if before is None or after is None:
+            return None
+
+        diff = "".join(
+            difflib.unified_diff(before, after, f"a/{path}", f"b/{path}", n=2)
+        )
+        if len(diff) > _MAX_DIFF_CHARS:
+            diff = diff[:_MAX_DIFF_CHARS] + "\n... (diff truncated)\n"
+
+        total += len(diff)
+        if total > _MAX_DIFFS_CHARS:
+            return None
+        parts.append(diff)
+
+    return "\n".join(parts).strip() or None
@@ -28,11 +28,18 @@ def _format_block(
     return f"<{tag}>\n{escape_for_prompt_block(text)}\n</{tag}>"
 
 
-def build_prompt(
+def _signal_blocks(digest: str | None, *blocks: str) -> str:
+    # With a digest, the raw README, tree and files are replaced by the
+    # condensed summary produced by build_digest_prompt.
+    if digest is not None:
+        return _format_block("repository_digest", digest)
+    return "\n\n".join(blocks)
+
+
+def build_digest_prompt(
     repo_name: str,
     description: str | None,
     readme: str | None,
-    detailed: bool = False,
     tree_text: str | None = None,
     files_text: str | None = None,
 ) -> str:
@@ -43,7 +50,8 @@ def build_prompt(
 
     prompt = f"""You are a senior software engineer.
 
-Your task is to explain a GitHub repository clearly and concisely for a human reader.
+Condense the signals of this GitHub repository into a compact, factual digest.
+Other prompts will be answered from your digest alone, without the original files.
 
 {metadata}
 
@@ -53,6 +61,53 @@ Your task is to explain a GitHub repository clearly and concisely for a human re
 
 {files_block}
 
+Rules:
+- Keep only facts supported by the provided signals.
+- Keep concrete file and directory paths, commands, and names exactly as written.
+- Use short bullets, no prose paragraphs.
+- Stay under 900 words.
+- Write "unknown" for anything the signals do not show.
+
+{_SECURITY_INSTRUCTION}
+
+Output exactly this markdown structure:
+## Purpose
+## Audience
+## Usage
+## Stack
+## Entry Points
+## Important Files
+## Directory Layout
+## Main Flow
+## Low-Signal Areas
+## Open Questions
+"""
+    return prompt.strip()
+
+
+def build_prompt(
+    repo_name: str,
+    description: str | None,
+    readme: str | None,
+    detailed: bool = False,
+    tree_text: str | None = None,
+    files_text: str | None = None,
+    digest: str | None = None,
+) -> str:
+    metadata = _format_metadata(repo_name, description)
+    readme_block = _format_block("readme", readme, "No README provided")
+    tree_block = _format_block("repo_structure", tree_text, "No file tree provided")
+    files_block = _format_block("code_files", files_text, "No code files provided")
+    signals = _signal_blocks(digest, readme_block, tree_block, files_block)
+
+    prompt = f"""You are a senior software engineer.
+
+Your task is to explain a GitHub repository clearly and concisely for a human reader.
+
+{metadata}
+
+{signals}
+
 Instructions:
 - Explain what this project does.
 - Say who it is for.
@@ -94,6 +149,7 @@ def build_repo_map_prompt(
     readme: str | None,
     tree_text: str | None = None,
     files_text: str | None = None,
+    digest: str | None = None,
 ) -> str:
     metadata = _format_metadata(repo_name, description)
     readme_content = readme[:6000] if readme else None
@@ -107,6 +163,7 @@ def build_repo_map_prompt(
         files_content,
         "No high-signal files provided",
     )
+    signals = _signal_blocks(digest, readme_block, tree_block, files_block)
 
     return f"""You are a senior systems-minded software engineer.
 
@@ -114,11 +171,7 @@ Your task is to map this system before a developer changes it.
 
 {metadata}
 
-{readme_block}
-
-{tree_block}
-
-{files_block}
+{signals}
 
 Rules:
 - Use only the provided repository metadata, README, tree, and high-signal file snippets.
@@ -159,14 +212,49 @@ Output exactly this markdown structure:
 """.strip()
 
 
+def build_update_prompt(
+    repo_name: str,
+    description: str | None,
+    previous: str,
+    diffs_text: str,
+) -> str:
+    metadata = _format_metadata(repo_name, description)
+    previous_block = _format_block("previous_explanation", previous)
+    diffs_block = _format_block("changed_files", diffs_text, "No changes provided")
+
+    prompt = f"""You are a senior software engineer.
+
+You wrote the explanation below for this GitHub repository.
+A few of the files it was based on have changed since then.
+
+{metadata}
+
+{previous_block}
+
+{diffs_block}
+
+Instructions:
+- Update the explanation so it matches the changed files.
+- Keep every part the changes do not affect exactly as it is.
+- Keep the same headings, structure and tone.
+- Do not mention that the explanation was updated.
+- Return the complete updated explanation only.
+
+{_SECURITY_INSTRUCTION}
+"""
+    return prompt.strip()
+
+
 def build_quick_prompt(
     repo_name: str,
     description: str | None,
     readme: str | None,
+    digest: str | None = None,
 ) -> str:
     metadata = _format_metadata(repo_name, description)
     readme_content = readme[:2000] if readme else None
     readme_block = _format_block("readme", readme_content, "No README provided")
+    signals = _signal_blocks(digest, readme_block)
 
     prompt = f"""You are a senior software engineer.
 
@@ -174,7 +262,7 @@ Write a ONE-SENTENCE plain-English definition of what this GitHub repository is.
 
 {metadata}
 
-{readme_block}
+{signals}
 
 Rules:
 - Output MUST be exactly 1 sentence.
@@ -195,6 +283,7 @@ def build_simple_prompt(
     description: str | None,
     readme: str | None,
     tree_text: str | None = None,
+    digest: str | None = None,
 ) -> str:
     metadata = _format_metadata(repo_name, description)
 
@@ -203,6 +292,7 @@ def build_simple_prompt(
 
     readme_block = _format_block("readme", readme_content, "No README provided")
     tree_block = _format_block("repo_structure", tree_content, "No file tree provided")
+    signals = _signal_blocks(digest, readme_block, tree_block)
 
     prompt = f"""You are a senior software engineer.
 
@@ -210,9 +300,7 @@ Summarize this GitHub repository in a concise bullet-point format.
 
 {metadata}
 
-{readme_block}
-
-{tree_block}
+{signals}
 
 Output style rules:
 - Plain English.
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import requests
+
+# Once fewer than this share of the window's calls (and at least this many)
+# remain, requests are spread evenly over what is left of the window instead
+# of being sent as fast as possible.
+_LOW_WATER_RATIO = 0.05
+_LOW_WATER_MIN = 10
+
+# Longest single wait the scheduler will sit through before giving up and
+# letting the caller surface the rate-limit error.
+_MAX_WAIT_SECONDS = 60.0
+
+# GitHub asks clients hitting a secondary limit without Retry-After to wait
+# at least a minute before retrying.
+_SECONDARY_DEFAULT_WAIT = 60.0
+
+
+@dataclass(frozen=True)
+class RateLimitBudget:
+    resource: str
+    limit: int
+    remaining: int
+    reset_at: float
+
+    def seconds_until_reset(self, now: Optional[float] = None) -> float:
+        return max(0.0, self.reset_at - (time.time() if now is None else now))
+
+
+def _header_int(response: requests.Response, name: str) -> Optional[int]:
+    value = response.headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def rate_limit_kind(response: requests.Response) -> Optional[str]:
+    if response.status_code not in (403, 429):
+        return None
+
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        return "primary"
+
+    text_lower = (response.text or "").lower()
+    if "secondary rate limit" in text_lower or "abuse" in text_lower:
+        return "secondary"
+    if response.headers.get("Retry-After") is not None:
+        return "secondary"
+    if "rate limit" in text_lower:
+        return "primary" if response.status_code == 429 else "secondary"
+
+    return None
+
+
+class RateLimitScheduler:
+    def __init__(
+        self,
+        *,
+        low_water_ratio: float = _LOW_WATER_RATIO,
+        max_wait: float = _MAX_WAIT_SECONDS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.low_water_ratio = low_water_ratio
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._budgets: dict[str, RateLimitBudget] = {}
+        self._next_slot: dict[str, float] = {}
+        self._blocked_until = 0.0
+        self.waited = 0.0
+
+    def _low_water(self, budget: RateLimitBudget) -> int:
+        return max(_LOW_WATER_MIN, int(budget.limit * self.low_water_ratio))
+
+    def budget(self, resource: str = "core") -> Optional[RateLimitBudget]:
+        with self._lock:
+            return self._budgets.get(resource)
+
+    def acquire(self, resource: Optional[str]) -> None:
+        if resource is None:
+            return
+
+        with self._lock:
+            now = self._clock()
+            wait = max(0.0, self._blocked_until - now)
+
+            budget = self._budgets.get(resource)
+            if budget is not None and now < budget.reset_at:
+                remaining = budget.remaining
+                if remaining <= 0:
+                    wait = max(wait, budget.reset_at - now)
+                elif remaining <= self._low_water(budget):
+                    # Token bucket refilled at the rate that spends exactly
+                    # the remaining quota by the time the window resets.
+                    interval = (budget.reset_at - now) / remaining
+                    slot = max(now, self._next_slot.get(resource, now))
+                    wait = max(wait, slot - now)
+                    self._next_slot[resource] = slot + interval
+
+                # Count this request against the local estimate until the
+                # next response reports the real number.
+                self._budgets[resource] = RateLimitBudget(
+                    resource=budget.resource,
+                    limit=budget.limit,
+                    remaining=max(0, remaining - 1),
+                    reset_at=budget.reset_at,
+                )
+
+            if wait > self.max_wait:
+                wait = 0.0
+
+        if wait > 0:
+            self.waited += wait
+            self._sleep(wait)
+
+    def observe(self, response: requests.Response) -> None:
+        limit = _header_int(response, "X-RateLimit-Limit")
+        remaining = _header_int(response, "X-RateLimit-Remaining")
+        reset = _header_int(response, "X-RateLimit-Reset")
+        if limit is None or remaining is None or reset is None:
+            return
+
+        resource = response.headers.get("X-RateLimit-Resource") or "core"
+        with self._lock:
+            self._budgets[resource] = RateLimitBudget(
+                resource=resource,
+                limit=limit,
+                remaining=remaining,
+                reset_at=float(reset),
+            )
+
+    def retry_delay(self, response: requests.Response, attempt: int) -> Optional[float]:
+        kind = rate_limit_kind(response)
+        if kind is None:
+            return None
+
+        now = self._clock()
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                delay = max(0.0, float(retry_after))
+            except ValueError:
+                delay = None
+        else:
+            delay = None
+
+        if delay is None and kind == "primary":
+            reset = _header_int(response, "X-RateLimit-Reset")
+            if reset is not None:
+                delay = max(0.0, reset - now) + 1.0
+
+        if delay is None:
+            delay = _SECONDARY_DEFAULT_WAIT * (2**attempt)
+
+        if delay > self.max_wait:
+            return None
+
+        # Hold back every other request on this token until the window
+        # reopens, not just the one that was refused.
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, now + delay)
+        return delay
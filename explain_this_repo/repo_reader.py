@@ -1,9 +1,30 @@
 from __future__ import annotations
 
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Optional
-
-from explain_this_repo.github import fetch_file, fetch_tree
+from typing import Any, Callable, Generator, Optional
+
+from explain_this_repo.blob_cache import get_blob, git_blob_sha, put_blob
+from explain_this_repo.github import (
+    ArchiveLimitError,
+    fetch_archive_files,
+    fetch_file_content,
+    fetch_files_graphql,
+    fetch_git_tree,
+    fetch_tree_listing,
+)
+from explain_this_repo.selection import (
+    MAX_FILE_CHARS,
+    MAX_FILES,
+    MAX_SNIPPET_BYTES,
+    collect_snippets,
+    format_files_snippets,
+    is_noise_file,
+    iter_ranked,
+    pick_signal_files,
+    score_path,
+)
 
 
 @dataclass
@@ -12,57 +33,36 @@ class ReadResult:
     tree_text: str
     files_text: str
     key_files: dict[str, str] = field(default_factory=dict)
-
-
-MAX_FILES = 20
-MAX_TOTAL_CHARS = 150_000
-MAX_FILE_CHARS = 8000
-
-
-def _is_noise_file(path: str) -> bool:
-    p = path.lower()
-    if p.endswith((".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp")):
-        return True
-    if p.endswith((".mp4", ".mov", ".avi", ".mkv")):
-        return True
-    if p.endswith((".zip", ".tar", ".gz", ".7z", ".rar")):
-        return True
-    if p.endswith((".lock", ".min.js", ".min.css")):
-        return True
-    if "/dist/" in f"/{p}/" or "/build/" in f"/{p}/" or "/.git/" in f"/{p}/":
-        return True
-    if p.startswith("dist/") or p.startswith("build/"):
-        return True
-    return False
-
-
-def _score_path(path: str) -> int:
-    p = path.lower()
-
-    if p in {"package.json", "pyproject.toml", "requirements.txt", "setup.py"}:
-        return 100
-    if p in {"readme.md", "readme"}:
-        return 90
-
-    if p.endswith(("main.py", "__main__.py", "cli.py", "cli.ts", "cli.js")):
-        return 85
-    if p.endswith(
-        ("index.js", "index.ts", "app.js", "app.ts", "server.js", "server.ts")
-    ):
-        return 80
-
-    if p in {"dockerfile", "compose.yml", "docker-compose.yml"}:
-        return 75
-    if p.endswith(("tsconfig.json", "vite.config.ts", "next.config.js", "vercel.json")):
-        return 70
-
-    if p.startswith(("src/", "app/", "apps/", "packages/", "lib/", "api/")):
-        return 60
-
-    if p.startswith(("tests/", "test/")):
-        return 40
-
-    return 10
+    blob_shas: dict[str, str] = field(default_factory=dict)
+    tree_sha: str = ""
+
+
+DEFAULT_FETCH_CONCURRENCY = 8
+
+FETCH_BACKENDS = ("auto", "contents", "archive", "graphql")
+# Above this many files one tarball download beats per-file contents calls,
+# as long as the whole repository is small enough to download. The archive
+# is read in path order, so it may have to be streamed almost to the end.
+ARCHIVE_THRESHOLD = 10
+ARCHIVE_MAX_TREE_BYTES = 8 * 1024 * 1024
+
+# Hard ceiling on entries collected when a truncated tree has to be walked
+# directory by directory.
+MAX_WALK_ENTRIES = 20_000
+
+_KEY_FILENAMES = {
+    "package.json",
+    "pyproject.toml",
+    "requirements.txt",
+    "setup.py",
+    "setup.cfg",
+    "cargo.toml",
+    "go.mod",
+    "readme.md",
+    "readme.rst",
+    "readme.txt",
+    "readme",
+}
 
 
 def _render_tree(tree: list[dict[str, Any]], max_lines: int = 160) -> str:
@@ -73,7 +73,7 @@ def _render_tree(tree: list[dict[str, Any]], max_lines: int = 160) -> str:
         path = item.get("path")
         if not path:
             continue
-        if _is_noise_file(path):
+        if is_noise_file(path):
             continue
         paths.append(path)
 
@@ -85,78 +85,316 @@ def _render_tree(tree: list[dict[str, Any]], max_lines: int = 160) -> str:
 
 
 def _pick_signal_files(tree: list[dict[str, Any]]) -> list[str]:
-    candidates = []
-    for item in tree:
-        if item.get("type") != "blob":
-            continue
-        path = item.get("path")
-        if not path:
-            continue
-        if _is_noise_file(path):
-            continue
-        candidates.append(path)
+    return pick_signal_files(
+        item.get("path") or "" for item in tree if item.get("type") == "blob"
+    )
 
-    candidates.sort(key=_score_path, reverse=True)
 
-    picked = []
-    seen = set()
-    for p in candidates:
-        if p in seen:
-            continue
-        seen.add(p)
-        picked.append(p)
-        if len(picked) >= MAX_FILES:
-            break
+def _best_nested_score(directory: str) -> int:
+    # A directory's own score says little about the files inside it: the
+    # exact-path scores only apply at the root, but an entry point such as
+    # cli.py scores as high anywhere below it.
+    return score_path(f"{directory}/cli.py")
+
+
+def _selection_satisfied(
+    candidate_scores: list[int],
+    frontier: list[tuple[int, int, str, str]],
+) -> bool:
+    if len(candidate_scores) < MAX_FILES:
+        return False
+
+    # Nothing still queued can beat a full selection at or above the best
+    # score any file under a pending directory could reach.
+    best_pending = max(_best_nested_score(path) for _, _, path, _ in frontier)
+    strong = sum(1 for score in candidate_scores if score >= best_pending)
+    return strong >= MAX_FILES
 
-    return picked
 
+def _walk_tree(
+    owner: str,
+    repo: str,
+    root_sha: str,
+    token: Optional[str],
+    concurrency: int,
+) -> list[dict[str, Any]]:
+    entries: list[dict[str, Any]] = []
+    candidate_scores: list[int] = []
+    frontier: list[tuple[int, int, str, str]] = []
+
+    def absorb(prefix: str, depth: int, items: list[dict]) -> None:
+        for item in items:
+            name = item.get("path")
+            if not name:
+                continue
+            path = f"{prefix}{name}"
+            entries.append({**item, "path": path})
+
+            if item.get("type") == "tree":
+                if item.get("sha") and not is_noise_file(f"{path}/"):
+                    score = score_path(f"{path}/")
+                    heapq.heappush(frontier, (depth + 1, -score, path, item["sha"]))
+            elif item.get("type") == "blob" and not is_noise_file(path):
+                candidate_scores.append(score_path(path))
+
+    root = fetch_git_tree(owner, repo, root_sha, recursive=False, token=token)
+    absorb("", 0, root.entries)
+
+    # Breadth-first, best-ranked directories first within a level, a batch
+    # of subtree listings at a time.
+    window = max(1, concurrency)
+    with ThreadPoolExecutor(max_workers=window) as pool:
+        while frontier and len(entries) < MAX_WALK_ENTRIES:
+            if _selection_satisfied(candidate_scores, frontier):
+                break
+
+            batch = [heapq.heappop(frontier) for _ in range(min(window, len(frontier)))]
+            listings = pool.map(
+                lambda node: fetch_git_tree(
+                    owner, repo, node[3], recursive=False, token=token
+                ),
+                batch,
+            )
+            for (depth, _, path, _), listing in zip(batch, listings):
+                absorb(f"{path}/", depth, listing.entries)
+
+    return entries[:MAX_WALK_ENTRIES]
+
+
+def _load_tree(
+    owner: str,
+    repo: str,
+    token: Optional[str],
+    concurrency: int,
+    ref: Optional[str] = None,
+) -> tuple[list[dict[str, Any]], str, bool]:
+    listing = fetch_tree_listing(owner, repo, token=token, ref=ref)
+    if not listing.truncated or not listing.sha:
+        return listing.entries, listing.sha, listing.truncated
 
-def _format_files_snippets(snips: list[tuple[str, str]]) -> str:
-    if not snips:
-        return "No code files provided"
+    # GitHub cut the recursive listing short, so it is an arbitrary subset of
+    # the repository; rebuild it from the subtrees that matter instead.
+    entries = _walk_tree(owner, repo, listing.sha, token, concurrency)
+    return entries, listing.sha, True
 
-    out = []
-    for path, content in snips:
-        out.append(f"\n=== {path} ===\n{content.strip()}\n")
-    return "\n".join(out).strip()
+
+def _tree_bytes(tree: list[dict[str, Any]]) -> int:
+    total = 0
+    for item in tree:
+        size = item.get("size")
+        if item.get("type") == "blob" and isinstance(size, int):
+            total += size
+    return total
+
+
+def _prefer_archive(
+    tree: list[dict[str, Any]], truncated: bool, picked: list[str]
+) -> bool:
+    if truncated or len(picked) <= ARCHIVE_THRESHOLD:
+        return False
+    return _tree_bytes(tree) <= ARCHIVE_MAX_TREE_BYTES
+
+
+def _key_file_paths(tree: list[dict[str, Any]]) -> list[str]:
+    paths = []
+    for item in tree:
+        if item.get("type") != "blob":
+            continue
+        path = item.get("path") or ""
+        if "/" not in path and path.lower() in _KEY_FILENAMES:
+            paths.append(path)
+    return paths
+
+
+class _BlobMemory:
+    def __init__(self, tree: list[dict[str, Any]]) -> None:
+        self._blobs = {
+            item["path"]: item
+            for item in tree
+            if item.get("type") == "blob" and item.get("path")
+        }
+
+    def recall(self, paths: list[str]) -> dict[str, str]:
+        texts: dict[str, str] = {}
+        for path in paths:
+            data = get_blob(self._blobs.get(path, {}).get("sha"), MAX_SNIPPET_BYTES)
+            if data is not None:
+                texts[path] = data.decode("utf-8", errors="replace")
+        return texts
+
+    def shas(self, paths: list[str]) -> dict[str, str]:
+        return {
+            path: self._blobs[path]["sha"]
+            for path in paths
+            if self._blobs.get(path, {}).get("sha")
+        }
+
+    def remember(self, path: str, data: Optional[bytes], exact: bool = False) -> None:
+        # data is the blob as received, or a prefix of it. With exact, it
+        # was rebuilt from decoded text and is kept only if it hashes to
+        # the blob, i.e. the file really was that text in UTF-8.
+        item = self._blobs.get(path)
+        if not item or not data:
+            return
+
+        size = item.get("size")
+        if exact:
+            if git_blob_sha(data) != item.get("sha"):
+                return
+            size = len(data)
+
+        data = data[:MAX_SNIPPET_BYTES]
+        if isinstance(size, int):
+            complete = size <= len(data)
+        else:
+            complete = len(data) < MAX_SNIPPET_BYTES
+            size = None
+        put_blob(item.get("sha"), data, complete=complete, size=size)
+
+
+def _iter_contents(
+    owner: str,
+    repo: str,
+    picked: list[str],
+    token: Optional[str],
+    concurrency: int,
+    cached: dict[str, str],
+    blobs: _BlobMemory,
+    ref: Optional[str] = None,
+) -> Generator[tuple[str, Optional[str]], None, None]:
+    def read(path: str) -> Optional[str]:
+        if path in cached:
+            return cached[path]
+        content = fetch_file_content(
+            owner, repo, path, token=token, max_bytes=MAX_SNIPPET_BYTES, ref=ref
+        )
+        if content is None:
+            return None
+        raw, text = content
+        blobs.remember(path, raw)
+        return text
+
+    return iter_ranked(picked, read, concurrency)
+
+
+def _iter_batch(
+    fetch_many: Callable[[list[str]], dict[str, bytes]],
+    picked: list[str],
+    key_paths: list[str],
+    cached: dict[str, str],
+    blobs: _BlobMemory,
+    key_files: dict[str, str],
+    exact: bool = False,
+) -> Generator[tuple[str, Optional[str]], None, None]:
+    wanted = picked + [p for p in key_paths if p not in picked]
+    missing = [p for p in wanted if p not in cached]
+
+    contents = dict(cached)
+    if missing:
+        for path, data in fetch_many(missing).items():
+            blobs.remember(path, data, exact=exact)
+            contents[path] = data.decode("utf-8", errors="replace")
+
+    for path in key_paths:
+        if contents.get(path):
+            key_files[path] = contents[path][:MAX_FILE_CHARS]
+
+    for path in picked:
+        yield path, contents.get(path)
 
 
 def read_repo_signal_files(
     owner: str,
     repo: str,
     token: Optional[str] = None,
+    fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    backend: str = "auto",
+    ref: Optional[str] = None,
 ) -> ReadResult:
+    if backend not in FETCH_BACKENDS:
+        raise ValueError(
+            f"Unknown fetch backend '{backend}'. "
+            f"Available backends: {', '.join(FETCH_BACKENDS)}"
+        )
+
     key_files: dict[str, str] = {}
 
     # token flows here
-    tree = fetch_tree(owner, repo, token=token)
+    tree, tree_sha, truncated = _load_tree(owner, repo, token, fetch_concurrency, ref)
 
     tree_text = _render_tree(tree)
     picked = _pick_signal_files(tree)
+    key_paths = _key_file_paths(tree)
 
-    total = 0
-    snippets: list[tuple[str, str]] = []
-
-    for p in picked:
-        if total >= MAX_TOTAL_CHARS:
-            break
-
-        content = fetch_file(owner, repo, p, token=token)
-        if not content:
-            continue
-
-        snippet = content[:MAX_FILE_CHARS]
-        total += len(snippet)
-        snippets.append((p, snippet))
-
-        if len(snippets) >= MAX_FILES:
-            break
+    use_archive = backend == "archive" or (
+        backend == "auto" and _prefer_archive(tree, truncated, picked)
+    )
 
-    files_text = _format_files_snippets(snippets)
+    # Blobs are content-addressed, so anything seen before under the same
+    # SHA is served locally and only the rest goes to the chosen backend.
+    blobs = _BlobMemory(tree)
+    cached = blobs.recall(picked + [p for p in key_paths if p not in picked])
+
+    snippets: Optional[list[tuple[str, str]]] = None
+    if backend == "graphql":
+        # GraphQL only returns decoded text, never the blob's bytes.
+        snippets = collect_snippets(
+            _iter_batch(
+                lambda paths: {
+                    path: text.encode("utf-8", errors="surrogatepass")
+                    for path, text in fetch_files_graphql(
+                        owner, repo, paths, token=token, ref=ref or "HEAD"
+                    ).items()
+                },
+                picked,
+                key_paths,
+                cached,
+                blobs,
+                key_files,
+                exact=True,
+            )
+        )
+    elif use_archive:
+        try:
+            snippets = collect_snippets(
+                _iter_batch(
+                    lambda paths: fetch_archive_files(
+                        owner,
+                        repo,
+                        paths,
+                        token=token,
+                        ref=ref,
+                        max_bytes=MAX_SNIPPET_BYTES,
+                    ),
+                    picked,
+                    key_paths,
+                    cached,
+                    blobs,
+                    key_files,
+                )
+            )
+        except ArchiveLimitError:
+            # Too large or too slow to stream: fetch the files one by one.
+            pass
+        except RuntimeError:
+            if backend == "archive":
+                raise
+
+    if snippets is None:
+        snippets = collect_snippets(
+            _iter_contents(
+                owner, repo, picked, token, fetch_concurrency, cached, blobs, ref
+            )
+        )
+        key_files = {path: text for path, text in snippets if path in key_paths}
+
+    files_text = format_files_snippets(snippets)
 
     return ReadResult(
         tree=tree,
         tree_text=tree_text,
         files_text=files_text,
         key_files=key_files,
+        blob_shas=blobs.shas([path for path, _ in snippets]),
+        tree_sha=tree_sha,
     )
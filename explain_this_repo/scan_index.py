@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from explain_this_repo.cache import CacheStore, shared_store
+
+SCAN_INDEX_CACHE_NAME = "scan_index"
+SCAN_INDEX_MAX_BYTES = 256 * 1024 * 1024
+SCAN_INDEX_VERSION = 1
+
+# Filesystems only keep mtimes to some granularity, so anything modified
+# this close to the previous scan may have changed again within the same
+# tick and is re-read instead of trusted ("racily clean" in git terms).
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+@dataclass
+class ScanIndex:
+    scanned_at_ns: int = 0
+    # relative dir -> [mtime_ns, inode, file names, subdirectory names]
+    dirs: dict[str, list[Any]] = field(default_factory=dict)
+    # relative path -> [size, mtime_ns, inode, sha256, text]
+    files: dict[str, list[Any]] = field(default_factory=dict)
+
+    def is_fresh(self, mtime_ns: int) -> bool:
+        return mtime_ns < self.scanned_at_ns - _RACY_WINDOW_NS
+
+
+def _index_store() -> Optional[CacheStore]:
+    return shared_store(SCAN_INDEX_CACHE_NAME, SCAN_INDEX_MAX_BYTES)
+
+
+def _index_key(root: Path) -> str:
+    return f"v{SCAN_INDEX_VERSION}:{root}"
+
+
+def load_scan_index(root: Path) -> ScanIndex:
+    store = _index_store()
+    if store is None:
+        return ScanIndex()
+
+    try:
+        entry = store.get(_index_key(root))
+        if entry is None:
+            store.count("misses")
+            return ScanIndex()
+        data = json.loads(zlib.decompress(entry.value))
+        store.count("hits")
+        return ScanIndex(
+            scanned_at_ns=int(data["scanned_at_ns"]),
+            dirs=data["dirs"],
+            files=data["files"],
+        )
+    except Exception:
+        return ScanIndex()
+
+
+def save_scan_index(root: Path, index: ScanIndex) -> None:
+    store = _index_store()
+    if store is None:
+        return
+
+    payload = {
+        "scanned_at_ns": index.scanned_at_ns,
+        "dirs": index.dirs,
+        "files": index.files,
+    }
+    try:
+        store.put(
+            _index_key(root),
+            zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8")),
+        )
+    except Exception:
+        pass
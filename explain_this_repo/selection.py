@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Generator, Iterable, Optional
+
+MAX_FILES = 20
+MAX_TOTAL_CHARS = 150_000
+MAX_FILE_CHARS = 8000
+
+# A code point is at most 4 bytes, so this many bytes always covers
+# MAX_FILE_CHARS of text.
+MAX_SNIPPET_BYTES = MAX_FILE_CHARS * 4
+
+
+def is_noise_file(path: str) -> bool:
+    p = path.lower()
+    if p.endswith((".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp")):
+        return True
+    if p.endswith((".mp4", ".mov", ".avi", ".mkv")):
+        return True
+    if p.endswith((".zip", ".tar", ".gz", ".7z", ".rar")):
+        return True
+    if p.endswith((".lock", ".min.js", ".min.css")):
+        return True
+    if "/dist/" in f"/{p}/" or "/build/" in f"/{p}/" or "/.git/" in f"/{p}/":
+        return True
+    if p.startswith("dist/") or p.startswith("build/"):
+        return True
+    return False
+
+
+def score_path(path: str) -> int:
+    p = path.lower()
+
+    if p in {"package.json", "pyproject.toml", "requirements.txt", "setup.py"}:
+        return 100
+    if p in {"readme.md", "readme"}:
+        return 90
+
+    if p.endswith(("main.py", "__main__.py", "cli.py", "cli.ts", "cli.js")):
+        return 85
+    if p.endswith(
+        ("index.js", "index.ts", "app.js", "app.ts", "server.js", "server.ts")
+    ):
+        return 80
+
+    if p in {"dockerfile", "compose.yml", "docker-compose.yml"}:
+        return 75
+    if p.endswith(("tsconfig.json", "vite.config.ts", "next.config.js", "vercel.json")):
+        return 70
+
+    if p.startswith(("src/", "app/", "apps/", "packages/", "lib/", "api/")):
+        return 60
+
+    if p.startswith(("tests/", "test/")):
+        return 40
+
+    return 10
+
+
+def pick_signal_files(paths: Iterable[str]) -> list[str]:
+    candidates = [path for path in paths if path and not is_noise_file(path)]
+    candidates.sort(key=score_path, reverse=True)
+
+    picked = []
+    seen = set()
+    for p in candidates:
+        if p in seen:
+            continue
+        seen.add(p)
+        picked.append(p)
+        if len(picked) >= MAX_FILES:
+            break
+
+    return picked
+
+
+def iter_ranked(
+    picked: list[str],
+    read: Callable[[str], Optional[str]],
+    concurrency: int,
+) -> Generator[tuple[str, Optional[str]], None, None]:
+    # Reads run ahead of the consumer by at most `concurrency` files, but
+    # results are yielded in score order so the budget cut-off lands on
+    # exactly the same files as a sequential read. Closing the generator
+    # cancels whatever is still queued.
+    window = max(1, concurrency)
+    pending: dict[int, Future] = {}
+    pool = ThreadPoolExecutor(max_workers=window)
+
+    try:
+        for index, path in enumerate(picked):
+            for ahead in range(index, min(index + window, len(picked))):
+                if ahead not in pending:
+                    pending[ahead] = pool.submit(read, picked[ahead])
+
+            yield path, pending.pop(index).result()
+    finally:
+        for future in pending.values():
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def collect_snippets(
+    fetched: Generator[tuple[str, Optional[str]], None, None],
+) -> list[tuple[str, str]]:
+    total = 0
+    snippets: list[tuple[str, str]] = []
+
+    try:
+        for path, content in fetched:
+            if not content:
+                continue
+
+            snippet = content[:MAX_FILE_CHARS]
+            total += len(snippet)
+            snippets.append((path, snippet))
+
+            if len(snippets) >= MAX_FILES or total >= MAX_TOTAL_CHARS:
+                break
+    finally:
+        fetched.close()
+
+    return snippets
+
+
+def format_files_snippets(snips: list[tuple[str, str]]) -> str:
+    if not snips:
+        return "No code files provided"
+
+    out = []
+    for path, content in snips:
+        out.append(f"\n=== {path} ===\n{content.strip()}\n")
+    return "\n".join(out).strip()
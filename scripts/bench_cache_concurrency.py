@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import multiprocessing
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from explain_this_repo.cache import CacheStore  # noqa: E402
+
+STORE_NAME = "bench"
+DIGEST_SIZE = 32
+
+
+def make_value(key: str, rng: random.Random, max_size: int) -> bytes:
+    body = rng.randbytes(rng.randint(64, max_size))
+    payload = key.encode("utf-8") + b"\0" + body
+    return hashlib.sha256(payload).digest() + payload
+
+
+def check_value(key: str, value: bytes) -> bool:
+    digest, payload = value[:DIGEST_SIZE], value[DIGEST_SIZE:]
+    if hashlib.sha256(payload).digest() != digest:
+        return False
+    return payload.split(b"\0", 1)[0] == key.encode("utf-8")
+
+
+def worker(
+    directory: str,
+    max_bytes: int,
+    seed: int,
+    operations: int,
+    keys: int,
+    max_size: int,
+) -> tuple[int, int, int, int]:
+    store = CacheStore(STORE_NAME, max_bytes, directory=Path(directory))
+    rng = random.Random(seed)
+    hits = misses = corrupt = errors = 0
+
+    for _ in range(operations):
+        key = f"key-{rng.randrange(keys)}"
+        try:
+            if rng.random() < 0.7:
+                entry = store.get(key)
+                if entry is None:
+                    misses += 1
+                elif check_value(key, entry.value):
+                    hits += 1
+                else:
+                    corrupt += 1
+            else:
+                store.put(key, make_value(key, rng, max_size))
+        except sqlite3.Error as e:
+            print(f"worker {seed}: {e}", file=sys.stderr)
+            errors += 1
+
+    store.flush_counters()
+    return hits, misses, corrupt, errors
+
+
+def verify(path: Path) -> list[str]:
+    problems: list[str] = []
+    conn = sqlite3.connect(str(path))
+    try:
+        (integrity,) = conn.execute("PRAGMA integrity_check").fetchone()
+        if integrity != "ok":
+            problems.append(f"integrity_check: {integrity}")
+
+        (tracked,) = conn.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()
+        (actual,) = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if tracked != actual:
+            problems.append(f"totals drifted: tracked {tracked}, actual {actual}")
+
+        for key, value, size in conn.execute("SELECT key, value, size FROM entries"):
+            if len(value) != size or not check_value(key, bytes(value)):
+                problems.append(f"corrupt entry: {key}")
+    finally:
+        conn.close()
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Hammer one cache database from several processes at once."
+    )
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--max-value-kb", type=int, default=16)
+    parser.add_argument("--cap-mb", type=float, default=2.0)
+    args = parser.parse_args()
+
+    max_bytes = int(args.cap_mb * 1024 * 1024)
+    max_size = args.max_value_kb * 1024
+
+    with tempfile.TemporaryDirectory() as directory:
+        jobs = [
+            (directory, max_bytes, seed, args.operations, args.keys, max_size)
+            for seed in range(args.processes)
+        ]
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.starmap(worker, jobs)
+        elapsed = time.perf_counter() - started
+
+        hits, misses, corrupt, errors = (sum(column) for column in zip(*results))
+        path = Path(directory) / f"{STORE_NAME}.sqlite3"
+        problems = verify(path)
+
+        store = CacheStore(STORE_NAME, max_bytes, directory=Path(directory))
+        total = args.processes * args.operations
+        print(f"processes:   {args.processes}")
+        print(f"operations:  {total} in {elapsed:.2f}s ({total / elapsed:,.0f} ops/s)")
+        print(f"reads:       {hits} hits, {misses} misses, {corrupt} corrupt")
+        print(f"errors:      {errors}")
+        print(f"evictions:   {store.lifetime_counters().get('evictions', 0)}")
+        print(f"final size:  {store.total_bytes():,} bytes (cap {max_bytes:,})")
+        for problem in problems:
+            print(f"problem:     {problem}")
+
+    return 1 if corrupt or errors or problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
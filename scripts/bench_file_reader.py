@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from explain_this_repo import file_reader  # noqa: E402
+
+# The per-character detection the reader used before, kept here as the
+# reference the current implementation has to agree with.
+
+
+def old_text_ratio(value: str) -> float:
+    if not value:
+        return 1.0
+
+    visible = 0
+    for ch in value:
+        if ch.isprintable() or ch in "\n\r\t":
+            visible += 1
+    return visible / len(value)
+
+
+def old_is_probably_binary(sample: bytes) -> bool:
+    if not sample:
+        return False
+
+    if sample.startswith(
+        (
+            b"\xef\xbb\xbf",
+            b"\xff\xfe",
+            b"\xfe\xff",
+            b"\xff\xfe\x00\x00",
+            b"\x00\x00\xfe\xff",
+        )
+    ):
+        return False
+
+    if b"\x00" in sample:
+        for encoding in (
+            "utf-16",
+            "utf-16-le",
+            "utf-16-be",
+            "utf-32",
+            "utf-32-le",
+            "utf-32-be",
+        ):
+            try:
+                decoded = sample.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+            if old_text_ratio(decoded) >= 0.7:
+                return False
+        return True
+
+    control = 0
+    for byte in sample:
+        if byte in (9, 10, 13, 12, 8):
+            continue
+        if byte < 32 or byte == 127:
+            control += 1
+
+    return control / len(sample) > 0.3
+
+
+def old_decode_text(raw: bytes) -> str:
+    encodings = (
+        "utf-8",
+        "utf-8-sig",
+        "utf-16",
+        "utf-16-le",
+        "utf-16-be",
+        "cp1252",
+        "latin-1",
+    )
+
+    for encoding in encodings:
+        try:
+            text = raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+
+        if old_text_ratio(text) >= 0.6:
+            return text
+
+    raise ValueError("file appears to be binary or uses an unsupported text encoding")
+
+
+SAMPLE_TEXT = (
+    "def main() -> int:\n\treturn 0\n",
+    "Grüße aus Köln — naïve café, déjà vu.\r\n",
+    "日本語のテキストとコード。\n",
+    "Ελληνικά και русский текст\n",
+    "emoji 🚀✨ and symbols ∑∫√\n",
+    "soft­hyphen, zero​width, nbsp here\n",
+)
+
+ENCODINGS = (
+    "utf-8",
+    "utf-8-sig",
+    "utf-16",
+    "utf-16-le",
+    "utf-16-be",
+    "utf-32",
+    "utf-32-le",
+    "utf-32-be",
+    "cp1252",
+    "latin-1",
+)
+
+BOMS = (
+    b"",
+    b"\xef\xbb\xbf",
+    b"\xff\xfe",
+    b"\xfe\xff",
+    b"\xff\xfe\x00\x00",
+    b"\x00\x00\xfe\xff",
+)
+
+
+def random_text(rng: random.Random, size: int) -> str:
+    parts: list[str] = []
+    while sum(map(len, parts)) < size:
+        roll = rng.random()
+        if roll < 0.6:
+            parts.append(rng.choice(SAMPLE_TEXT))
+        elif roll < 0.8:
+            # Any code point at all, unassigned and private-use ones included.
+            parts.append(
+                "".join(
+                    chr(rng.choice((rng.randrange(0x20000), rng.randrange(0x110000))))
+                    for _ in range(rng.randint(1, 16))
+                )
+            )
+        else:
+            parts.append("".join(chr(rng.randrange(0x100)) for _ in range(8)))
+    return "".join(parts)[:size]
+
+
+def make_case(rng: random.Random, max_size: int) -> bytes:
+    size = rng.randint(0, max_size)
+    kind = rng.randrange(6)
+
+    if kind == 0:
+        return rng.randbytes(size)
+
+    if kind == 1:
+        # Text with control bytes mixed in at a rate near the 30% cut-off.
+        rate = rng.uniform(0.2, 0.4)
+        text = random_text(rng, size).encode("utf-8", "replace")
+        return bytes(
+            rng.randrange(32) if rng.random() < rate else byte for byte in text
+        )
+
+    if kind == 2:
+        # Bytes drawn from a small alphabet, so ratios land on exact values.
+        alphabet = rng.randbytes(rng.randint(1, 6)) + bytes([9, 10, 0, 127])
+        return bytes(rng.choice(alphabet) for _ in range(size))
+
+    text = random_text(rng, size)
+    encoding = rng.choice(ENCODINGS)
+    raw = text.encode(encoding, "surrogatepass" if "utf" in encoding else "replace")
+    if kind == 4:
+        raw = rng.choice(BOMS) + raw
+    if kind == 5 and raw:
+        # Truncated mid-character, the way a bounded read cuts files.
+        raw = raw[: rng.randrange(len(raw))]
+    return raw
+
+
+def make_text_file(rng: random.Random, max_size: int) -> bytes:
+    # What the reader mostly sees: ordinary source and prose, with the line
+    # holding invisible characters turning up now and then.
+    lines: list[str] = []
+    while sum(map(len, lines)) < max_size:
+        if rng.random() < 0.01:
+            lines.append(SAMPLE_TEXT[-1])
+        else:
+            lines.append(rng.choice(SAMPLE_TEXT[:-1]))
+    encoding = rng.choice(("utf-8", "utf-8", "utf-8", "utf-16", "cp1252"))
+    return "".join(lines).encode(encoding, "replace")[:max_size]
+
+
+def decode_outcome(decode: Callable[[bytes], str], raw: bytes) -> str | None:
+    try:
+        return decode(raw)
+    except ValueError:
+        return None
+
+
+def compare(corpus: list[bytes]) -> int:
+    mismatches = 0
+    for raw in corpus:
+        sample = raw[: file_reader._SAMPLE_SIZE]
+        checks = (
+            (
+                "binary",
+                old_is_probably_binary(sample),
+                file_reader._is_probably_binary(sample),
+            ),
+            (
+                "decode",
+                decode_outcome(old_decode_text, raw),
+                decode_outcome(file_reader._decode_text, raw),
+            ),
+            (
+                "ratio",
+                old_text_ratio(raw.decode("latin-1")),
+                file_reader._text_ratio(raw.decode("latin-1")),
+            ),
+        )
+        for name, old, new in checks:
+            if old != new:
+                mismatches += 1
+                print(f"{name} mismatch on {raw[:48]!r}: {old!r} != {new!r}")
+    return mismatches
+
+
+def measure(check: Callable[[bytes], object], corpus: list[bytes]) -> float:
+    started = time.perf_counter()
+    for raw in corpus:
+        try:
+            check(raw)
+        except ValueError:
+            pass
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Check text/binary detection against the old implementation and time both."
+    )
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--max-bytes", type=int, default=file_reader._MAX_DEFAULT_BYTES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_case(rng, args.max_bytes) for _ in range(args.cases)]
+    corpus.extend([b"", b"\0", b"\n" * 10, b"\x01" * 3 + b"a" * 7] + list(BOMS))
+
+    mismatches = compare(corpus)
+    print(f"cases:       {len(corpus)} ({mismatches} mismatched decisions)")
+
+    text_files = [make_text_file(rng, args.max_bytes) for _ in range(args.cases)]
+    text_mismatches = compare(text_files)
+    print(f"text files:  {len(text_files)} ({text_mismatches} mismatched decisions)")
+    mismatches += text_mismatches
+
+    for label, inputs in (("mixed corpus", corpus), ("text files", text_files)):
+        samples = [raw[: file_reader._SAMPLE_SIZE] for raw in inputs]
+        timings = (
+            ("binary check", old_is_probably_binary, file_reader._is_probably_binary),
+            ("decode", old_decode_text, file_reader._decode_text),
+        )
+        for name, old, new in timings:
+            data = samples if name == "binary check" else inputs
+            before = measure(old, data)
+            after = measure(new, data)
+            print(
+                f"{label:<13} {name:<13} before {before * 1000:8.1f} ms  "
+                f"after {after * 1000:8.1f} ms  ({before / after:5.1f}x)"
+            )
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from explain_this_repo.cache import disable_caches  # noqa: E402
+from explain_this_repo.local_reader import (  # noqa: E402
+    _SKIP_DIRS,
+    DEFAULT_SCAN_CONCURRENCY,
+    _git_tree,
+    _walk_tree,
+)
+from explain_this_repo.scan_index import ScanIndex  # noqa: E402
+
+GITIGNORE = """\
+target/
+out/
+.next/
+data/*.csv
+*.log
+"""
+
+
+def make_checkout(root: Path, source_files: int, ignored_files: int) -> None:
+    for i in range(source_files):
+        path = root / "src" / f"pkg{i % 40}" / f"module{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"VALUE = {i}\n", encoding="utf-8")
+
+    ignored = ("target/debug/deps", "out/chunks", ".next/cache/webpack", "data")
+    for i in range(ignored_files):
+        folder = root / ignored[i % len(ignored)] / f"part{i % 100}"
+        folder.mkdir(parents=True, exist_ok=True)
+        name = f"dump{i}.csv" if folder.parts[-2] == "data" else f"artifact{i}.bin"
+        (folder / name).write_bytes(b"\0" * 64)
+
+    (root / "README.md").write_text("# Bench\n", encoding="utf-8")
+    (root / "pyproject.toml").write_text("[project]\nname = 'bench'\n")
+    (root / ".gitignore").write_text(GITIGNORE, encoding="utf-8")
+
+    if shutil.which("git"):
+        subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+        subprocess.run(["git", "add", "-A"], cwd=root, check=True)
+
+
+def walk_everything(root: Path) -> list[str]:
+    # What the reader did before: list every directory except _SKIP_DIRS.
+    lines: list[str] = []
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        files, dirs = [], []
+        with os.scandir(root / rel_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+        lines.extend(f"{prefix}{name}" for name in sorted(files))
+        pending.extend(
+            f"{prefix}{name}"
+            for name in sorted(dirs, reverse=True)
+            if name not in _SKIP_DIRS
+        )
+    return lines
+
+
+def with_latency(scandir: Callable, seconds: float) -> Callable:
+    def delayed(path):
+        time.sleep(seconds)
+        return scandir(path)
+
+    return delayed
+
+
+def ignore_walk(root: Path, concurrency: int) -> list[str]:
+    scan = ScanIndex(scanned_at_ns=time.time_ns())
+    return _walk_tree(root, ScanIndex(), scan, concurrency=concurrency)[0]
+
+
+def measure(scan: Callable[[], list[str]], repeats: int) -> tuple[float, list[str]]:
+    best = float("inf")
+    lines: list[str] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        lines = scan()
+        best = min(best, time.perf_counter() - started)
+    return best, lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare local scan time and tree size with and without ignore rules."
+    )
+    parser.add_argument("path", nargs="?", help="checkout to scan (default: synthetic)")
+    parser.add_argument("--source-files", type=int, default=2000)
+    parser.add_argument("--ignored-files", type=int, default=40000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="delay added to every directory listing, to mimic a network filesystem",
+    )
+    args = parser.parse_args()
+
+    disable_caches()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.path:
+            root = Path(args.path).resolve()
+        else:
+            root = Path(scratch)
+            make_checkout(root, args.source_files, args.ignored_files)
+
+        if args.latency_ms:
+            os.scandir = with_latency(os.scandir, args.latency_ms / 1000)
+
+        scans = {
+            "walk everything (before)": lambda: walk_everything(root),
+            ".gitignore walk, serial": lambda: ignore_walk(root, 1),
+            ".gitignore walk, parallel": lambda: ignore_walk(
+                root, DEFAULT_SCAN_CONCURRENCY
+            ),
+            "git ls-files": lambda: (_git_tree(root) or ([], None))[0],
+        }
+
+        print(f"checkout: {args.path or 'synthetic'}")
+        for name, scan in scans.items():
+            elapsed, lines = measure(scan, args.repeats)
+            size = len("\n".join(lines).encode("utf-8"))
+            print(
+                f"{name:<28} {elapsed * 1000:9.1f} ms  "
+                f"{len(lines):7d} paths  {size / 1024:9.1f} KB tree text"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+# The benchmark keeps the per-character detection the reader used before as
+# its reference; the current implementation has to agree with it exactly.
+_SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "bench_file_reader.py"
+_spec = importlib.util.spec_from_file_location("bench_file_reader", _SCRIPT)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+EDGE_CASES = [
+    b"",
+    b"\0",
+    b"\n" * 10,
+    b"\x01" * 3 + b"a" * 7,
+    b"\x01" * 3 + b"a" * 6,
+    b"\t\n\r\x0c\x08",
+    b"\x7f" * 4,
+    "soft­hyphen​".encode("utf-8"),
+    "﻿bom text".encode("utf-8"),
+    "utf-16 text".encode("utf-16"),
+    "utf-32 text".encode("utf-32-be"),
+    "café".encode("cp1252"),
+    bytes(range(256)),
+    *bench.BOMS,
+]
+
+
+def _random_cases(count: int, max_size: int) -> list[bytes]:
+    rng = random.Random(0)
+    cases = [bench.make_case(rng, max_size) for _ in range(count)]
+    cases += [bench.make_text_file(rng, max_size) for _ in range(count // 4)]
+    return cases
+
+
+@pytest.mark.parametrize("raw", EDGE_CASES, ids=[repr(raw[:12]) for raw in EDGE_CASES])
+def test_edge_cases_match_the_reference(raw):
+    assert bench.compare([raw]) == 0
+
+
+def test_random_inputs_match_the_reference():
+    assert bench.compare(_random_cases(300, 4000)) == 0
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from explain_this_repo import cache, github
+
+COMMIT = "a" * 40
+
+
+class _GraphQLHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length))
+        self.server.posts.append(payload)
+
+        node = {
+            "name": "demo",
+            "nameWithOwner": "octo/demo",
+            "description": "A demo",
+            "isFork": False,
+            "isPrivate": False,
+            "owner": {"login": "octo"},
+            "parent": None,
+            "defaultBranchRef": {"name": "main"},
+            "languages": {"edges": [{"size": 120, "node": {"name": "Python"}}]},
+        }
+        for name, expression in payload["variables"].items():
+            if name.startswith("readme") and expression == f"{COMMIT}:README.md":
+                node[name] = {"text": "# Demo at commit", "isBinary": False}
+            elif name.startswith("readme"):
+                node[name] = None
+
+        rate = {"cost": 1, "remaining": 4999, "limit": 5000, "resetAt": ""}
+        body = json.dumps({"data": {"rateLimit": rate, "repository": node}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def graphql_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GraphQLHandler)
+    server.posts = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(cache, "_caches_enabled", False)
+    monkeypatch.setattr(github, "_clients", {})
+    monkeypatch.setattr(
+        github, "GITHUB_API_BASE", f"http://127.0.0.1:{server.server_port}"
+    )
+    github.configure_client("test-token", use_graphql=True)
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_pinned_run_reads_readme_from_the_overview_query(graphql_server):
+    repo = github.fetch_repo("octo", "demo", token="test-token", ref=COMMIT)
+    readme = github.fetch_readme("octo", "demo", token="test-token", ref=COMMIT)
+    languages = github.fetch_languages("octo", "demo", token="test-token")
+
+    assert repo["full_name"] == "octo/demo"
+    assert readme == "# Demo at commit"
+    assert languages == {"Python": 120}
+
+    assert len(graphql_server.posts) == 1
+    expressions = [
+        value
+        for name, value in graphql_server.posts[0]["variables"].items()
+        if name.startswith("readme")
+    ]
+    assert expressions
+    assert all(value.startswith(f"{COMMIT}:") for value in expressions)
+    assert "HEAD:" not in graphql_server.posts[0]["query"]
+
+
+def test_readme_at_another_ref_is_queried_again(graphql_server):
+    github.fetch_repo("octo", "demo", token="test-token", ref=COMMIT)
+    readme = github.fetch_readme("octo", "demo", token="test-token")
+
+    assert readme is None
+    assert len(graphql_server.posts) == 2
+    assert graphql_server.posts[1]["variables"]["readme0"] == "HEAD:README.md"
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from explain_this_repo import repo_reader
+from explain_this_repo.github import GitTree
+
+
+def _blob(name: str) -> dict:
+    return {"path": name, "type": "blob", "sha": f"blob-{name}", "size": 10}
+
+
+def _tree(name: str) -> dict:
+    return {"path": name, "type": "tree", "sha": f"tree-{name}"}
+
+
+def test_walk_reaches_entry_points_below_low_ranked_directories(monkeypatch):
+    trees = {
+        "root": [_blob(f"{i:02d}.tsconfig.json") for i in range(25)]
+        + [_blob("package.json"), _tree("src"), _tree("tools")],
+        "tree-src": [_blob(f"module{i:02d}.py") for i in range(30)],
+        "tree-tools": [_blob("cli.py")],
+    }
+    listed: list[str] = []
+
+    def fake_fetch_git_tree(owner, repo, tree_ref, recursive=False, token=None):
+        listed.append(tree_ref)
+        return GitTree(sha=tree_ref, entries=trees[tree_ref], truncated=False)
+
+    monkeypatch.setattr(repo_reader, "fetch_git_tree", fake_fetch_git_tree)
+
+    entries = repo_reader._walk_tree("octo", "demo", "root", None, concurrency=1)
+    picked = repo_reader._pick_signal_files(entries)
+
+    assert "tree-tools" in listed
+    assert picked[:2] == ["package.json", "tools/cli.py"]